@@ -0,0 +1,240 @@
+"""
+### Textify Benchmark
+Times what Textify does to a file (open, find, replace, save and word stats)
+on synthetic documents from 1 MB to 1 GB, using the headless `textify_core`,
+and prints the results as JSON.
+
+    python benchmark.py
+    python benchmark.py --sizes 1MB,10MB --kinds short --output results.json
+
+Documents are generated from a seed, so two runs with the same arguments
+time the same text.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+import textify_core
+from textify_core import LineStats, find_all, replace_all, open_document, save_document
+
+
+# * Benchmark variables
+SIZES = "1MB,10MB,100MB,1GB"  # sizes of the generated documents
+KINDS = ("short", "long", "unicode")  # see '_make_block'
+BLOCK_SIZE = 64 * 1024  # bytes (about) of each generated block
+BLOCK_COUNT = 64  # distinct blocks a document is assembled from
+SEARCH_WORD = "needle"  # word searched and replaced in every document
+REPLACE_WORD = "pin"
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+WORDS = {
+    "short": ("the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog",
+              "lorem", "ipsum", "dolor", "sit", "amet", "editor", "text",
+              "file", "line", "word", "Textify", SEARCH_WORD),
+    "unicode": ("naïve", "café", "straße", "ελληνικά", "русский", "текст",
+                "日本語", "中文字", "한국어", "עברית", "العربية", "हिन्दी",
+                "🙂", "🚀", "ünïcödé", "Textify", SEARCH_WORD),
+}
+
+
+# ? Document functions
+def _parse_size(size):
+    """Returns the number of bytes of a size like `10MB` (or plain bytes)"""
+    size = size.strip().upper()
+    for unit, factor in UNITS.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def _make_block(rng, kind):
+    """
+    ### Make Block
+    Returns about `BLOCK_SIZE` bytes of text of `kind`:
+    - `short`: many short lines of english-like words
+    - `long`: the same words, with a newline only every few hundred KB
+    - `unicode`: short lines of non-ascii words (accents, CJK, RTL, emoji)
+    """
+    words = WORDS["unicode" if kind == "unicode" else "short"]
+    lines = []
+    size = 0
+
+    while size < BLOCK_SIZE:
+        line = " ".join(rng.choices(words, k=rng.randint(0, 12)))
+        lines.append(line)
+        size += len(line.encode("utf-8")) + 1
+
+    if kind == "long":
+        # lines only end once in a while, so they run across many blocks
+        return " ".join(lines) + ("\n" if rng.random() < 0.1 else " ")
+
+    return "\n".join(lines) + "\n"
+
+
+def make_document(path, size, kind, seed=0):
+    """
+    ### Make Document
+    Writes a document of `kind` of (at least) `size` bytes to `path`,
+    assembled from `BLOCK_COUNT` distinct blocks picked at random.
+    """
+    rng = random.Random(f"{seed}-{kind}")
+    blocks = [_make_block(rng, kind).encode("utf-8")
+              for _ in range(BLOCK_COUNT)]
+
+    written = 0
+    with open(path, "wb") as file:
+        while written < size:
+            block = rng.choice(blocks)
+            file.write(block)
+            written += len(block)
+
+    return written
+
+
+# ? Timing functions
+def _time(function, repeat):
+    """
+    ### Time
+    Calls `function` `repeat` times, returns the seconds of each call and the
+    result of the last one.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+
+    return seconds, result
+
+
+def _result(operation, seconds, size, **extra):
+    """Returns the JSON record of an operation timed on `size` bytes"""
+    best = min(seconds)
+    return {
+        "operation": operation,
+        "seconds": [round(second, 6) for second in seconds],
+        "best": round(best, 6),
+        "median": round(statistics.median(seconds), 6),
+        "mb_per_s": round(size / (1024 * 1024) / max(best, 1e-9), 2),
+        **extra,
+    }
+
+
+def run_benchmark(path, repeat=3):
+    """
+    ### Run Benchmark
+    Times the editor's operations on the document at `path`, the way the
+    editor does them:
+    - `open`: `_open` (chunked read into a `Document`)
+    - `stats`: counting the words of every line, as `_reset_document` does,
+      and reading them back like `_get_chars_and_words`
+    - `find` / `find_nocase_word` / `find_regex`: `_find_text`
+    - `replace`: `_replace_text` (replace all)
+    - `save`: `_save` (atomic write)
+    """
+    size = os.path.getsize(path)
+    results = []
+
+    seconds, document = _time(lambda: open_document(path), repeat)
+    results.append(_result("open", seconds, size))
+    text = document.text()
+
+    seconds, stats = _time(lambda: LineStats(text), repeat)
+    results.append(_result("stats", seconds, size, chars=document.length,
+                           words=stats.total, lines=document.line_count))
+
+    searches = {
+        "find": {},
+        "find_nocase_word": {"nocase": True, "whole_word": True},
+        "find_regex": {"regex": True},
+    }
+    for operation, options in searches.items():
+        string = rf"{SEARCH_WORD}\b" if options.get("regex") else SEARCH_WORD
+        seconds, count = _time(
+            lambda: sum(1 for _ in find_all(text, string, **options)), repeat)
+        results.append(_result(operation, seconds, size, matches=count))
+
+    seconds, (new_text, count) = _time(
+        lambda: replace_all(text, SEARCH_WORD, REPLACE_WORD), repeat)
+    results.append(_result("replace", seconds, size, replaced=count))
+    del new_text
+
+    save_path = f"{path}.saved"
+    try:
+        seconds, written = _time(
+            lambda: save_document(document, save_path), repeat)
+        results.append(_result("save", seconds, size, bytes=written))
+    finally:
+        if os.path.exists(save_path):
+            os.remove(save_path)
+
+    return results
+
+
+# ? Program functions
+def main(argv=None):
+    """
+    ### Main
+    Generates every size and kind of document asked for, benchmarks them and
+    prints (or writes) the JSON results.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark Textify's core on synthetic documents")
+    parser.add_argument("--sizes", default=SIZES,
+                        help=f"comma separated sizes (default: {SIZES})")
+    parser.add_argument("--kinds", default=",".join(KINDS),
+                        help="comma separated kinds of documents "
+                        f"(default: {','.join(KINDS)})")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="times each operation is run (default: 3)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the generated documents (default: 0)")
+    parser.add_argument("--dir", default=None,
+                        help="where documents are generated (default: a temporary directory)")
+    parser.add_argument("--output", default=None,
+                        help="file the JSON results are written to (default: stdout)")
+    args = parser.parse_args(argv)
+
+    kinds = [kind.strip() for kind in args.kinds.split(",")]
+    for kind in kinds:
+        if kind not in KINDS:
+            parser.error(f"unknown kind {kind!r}, choose from {', '.join(KINDS)}")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "block_size": textify_core.DOCUMENT_BLOCK_SIZE,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "documents": [],
+    }
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for size in map(_parse_size, args.sizes.split(",")):
+            for kind in kinds:
+                path = os.path.join(directory, f"{kind}-{size}.txt")
+                written = make_document(path, size, kind, args.seed)
+                print(f"benchmarking {kind} document of {written:,} bytes",
+                      file=sys.stderr)
+
+                report["documents"].append({
+                    "kind": kind,
+                    "size": written,
+                    "results": run_benchmark(path, args.repeat),
+                })
+                os.remove(path)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
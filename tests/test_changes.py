@@ -0,0 +1,74 @@
+"""
+### External Changes Tests
+Randomized checks of `diff_texts` and `merge_hunks`, which merge the changes
+another program made to a file with the unsaved edits of the document.
+"""
+import random
+import unittest
+from unittest import mock
+
+import textify_core
+from textify_core import diff_texts, merge_hunks, shift_offset
+
+
+def _apply(text, hunks):
+    """Returns `text` with its `(start, end, text)` hunks replaced"""
+    for start, end, replacement in reversed(hunks):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def _mutate(rng, text, edits):
+    """Returns `text` with a few random edits"""
+    for _ in range(edits):
+        start = rng.randint(0, len(text))
+        end = min(len(text), start + rng.randint(0, 10))
+        text = (text[:start] + rng.choice(["", "x", "line\n", "\n", "zz yy\nq"])
+                + text[end:])
+    return text
+
+
+class MergeTest(unittest.TestCase):
+
+    def setUp(self):
+        # tiny blocks and limits, so the block by block diff is used too
+        patcher = mock.patch.multiple(textify_core, DIFF_BLOCK_SIZE=7,
+                                      DIFF_MAX_LINES=10, DIFF_BLOCK_LINES=3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_diff_and_merge(self):
+        for seed in range(1500):
+            rng = random.Random(seed)
+            base = "".join(rng.choice(["abc\n", "def\n", "g", "\n", "hello world\n"])
+                           for _ in range(rng.randint(0, 60)))
+            theirs = _mutate(rng, base, rng.randint(0, 4))
+            ours = _mutate(rng, base, rng.randint(0, 4))
+
+            their_hunks = diff_texts(base, theirs)
+            our_hunks = diff_texts(base, ours)
+            self.assertEqual(_apply(base, their_hunks), theirs, seed)
+            self.assertEqual(_apply(base, our_hunks), ours, seed)
+            self.assertTrue(all(first[1] <= second[0] for first, second in
+                                zip(their_hunks, their_hunks[1:])), seed)
+
+            patch, conflicts = merge_hunks(their_hunks, our_hunks)
+            merged = _apply(ours, patch)
+            if not our_hunks:
+                self.assertEqual((merged, conflicts), (theirs, 0), seed)
+            if not their_hunks:
+                self.assertEqual(merged, ours, seed)
+            if not conflicts:
+                # every change of both sides is in
+                self.assertEqual(merged, _apply(
+                    base, sorted(their_hunks + our_hunks)), seed)
+
+            for offset in range(len(ours) + 1):
+                self.assertTrue(0 <= shift_offset(offset, patch) <= len(merged))
+
+    def test_unchanged_text_has_no_hunks(self):
+        self.assertEqual(diff_texts("a\nb\n", "a\nb\n"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+### Document Tests
+Randomized checks of the piece tree of `Document` (and its snapshots),
+against the same edits made on a plain string.
+"""
+import random
+import unittest
+from unittest import mock
+
+import textify_core
+from textify_core import Document
+
+
+def _line_offset(text, line):
+    """Offset where `line` (1-based) starts in `text`, the way `Document` has it"""
+    if line <= 1:
+        return 0
+    starts = [index + 1 for index, char in enumerate(text) if char == "\n"]
+    return starts[line - 2] if line - 2 < len(starts) else len(text)
+
+
+class DocumentTest(unittest.TestCase):
+
+    def test_edits_match_a_string(self):
+        # small blocks, so the inserts are spread over many pieces
+        with mock.patch.object(textify_core, "DOCUMENT_BLOCK_SIZE", 64):
+            for seed in range(150):
+                self._check_edits(random.Random(seed), seed)
+
+    def _check_edits(self, rng, seed):
+        text = "".join(rng.choice("ab\n") for _ in range(rng.randrange(50)))
+        document = Document(text)
+        snapshots = []
+
+        for step in range(150):
+            if rng.random() < 0.6:
+                offset = rng.randrange(len(text) + 1)
+                inserted = "".join(rng.choice("xy\n\ud800") for _ in
+                                   range(rng.choice([1, 1, 3, 70])))
+                document.insert(offset, inserted)
+                text = text[:offset] + inserted + text[offset:]
+            else:
+                start = rng.randrange(len(text) + 1)
+                end = rng.randrange(start, len(text) + 1)
+                document.delete(start, end)
+                text = text[:start] + text[end:]
+
+            if rng.random() < 0.1:
+                snapshots.append((document.snapshot(), text))
+
+            where = (seed, step)
+            self.assertEqual(document.length, len(text), where)
+            self.assertEqual(document.line_count, text.count("\n") + 1, where)
+            self.assertEqual("".join(document.chunks(5)), text, where)
+
+            start = rng.randrange(len(text) + 1)
+            end = rng.randrange(start, len(text) + 1)
+            self.assertEqual(document.get(start, end), text[start:end], where)
+            self.assertEqual(document.offset_line(start),
+                             text[:start].count("\n") + 1, where)
+
+            line = rng.randrange(1, document.line_count + 2)
+            self.assertEqual(document.line_offset(line),
+                             _line_offset(text, line), where)
+
+            first = rng.randrange(1, document.line_count + 1)
+            last = rng.randrange(first, document.line_count + 1)
+            self.assertEqual(document.get_lines(first, last), "\n".join(
+                text.split("\n")[first - 1:last]), where)
+
+        self.assertEqual(document.text(), text, seed)
+
+        # the snapshots never see the later edits
+        for snapshot, snapshot_text in snapshots:
+            self.assertEqual(snapshot.text(), snapshot_text, seed)
+            self.assertEqual(snapshot.length, len(snapshot_text), seed)
+
+
+if __name__ == "__main__":
+    unittest.main()
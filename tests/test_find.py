@@ -0,0 +1,52 @@
+"""
+### Find Tests
+Randomized checks of `find_indices` against a search of the whole text, and
+the replacement templates `expand_matches` refuses.
+"""
+import re
+import random
+import unittest
+
+from textify_core import (Document, expand_matches, find_all, find_indices,
+                          offsets_to_indices, replace_all)
+
+
+class FindIndicesTest(unittest.TestCase):
+
+    def test_blocks_find_what_the_whole_text_has(self):
+        # strings spanning lines, overlapping themselves, and anchors
+        searches = [("ab", False), ("a\nb", False), ("b\na", False),
+                    ("a", False), ("aa", False), ("\n\n", False),
+                    ("\n\n\n", False), ("a+b?", True), ("^b", True),
+                    ("b$", True)]
+
+        for seed in range(1500):
+            rng = random.Random(seed)
+            text = "".join(rng.choice(["ab", "a\nb", "\n", "abab", "b", "aa"])
+                           for _ in range(rng.randrange(200)))
+            string, regex = rng.choice(searches)
+
+            found = list(find_indices(
+                Document(text).snapshot(), string, regex=regex,
+                block_lines=rng.choice([1, 2, 3, 7, 1000])))
+            expected = list(offsets_to_indices(
+                text, find_all(text, string, regex=regex)))
+            self.assertEqual(found, expected, (seed, string))
+
+
+
+class ExpandMatchesTest(unittest.TestCase):
+
+    def test_group_references(self):
+        self.assertEqual(replace_all("a1 b2", r"(\w)(\d)", r"\2\1", regex=True),
+                         ("1a 2b", 2))
+
+    def test_bad_template_is_refused_up_front(self):
+        pattern = re.compile("(x)")
+        for template in (r"\9", r"C:\dir", r"\g<name>"):
+            with self.assertRaises(re.error, msg=template):
+                expand_matches(pattern, template)
+
+
+if __name__ == "__main__":
+    unittest.main()
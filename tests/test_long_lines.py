@@ -0,0 +1,94 @@
+"""
+### Long Lines Tests
+Randomized checks of `LineSegments`: the rows it cuts, and the rows it cuts
+again after edits, always put back together into the lines of the text.
+"""
+import random
+import unittest
+
+from textify_core import LineSegments
+
+
+def _offset(text, position):
+    """Offset of a `(line, column)` position in `text`"""
+    line, column = position
+    return sum(len(line) + 1 for line in text.split("\n")[:line - 1]) + column
+
+
+class LineSegmentsTest(unittest.TestCase):
+
+    def _check(self, segments, text, rows, where):
+        lines = text.split("\n")
+        rows_of_lines = {}
+
+        for row, row_text in enumerate(rows, 1):
+            line, column = segments.to_line(row, 0)
+            self.assertEqual(lines[line - 1][column:column + len(row_text)],
+                             row_text, where)
+
+            # an empty row (or the one before it) shares its position
+            if row_text and not (row < len(rows) and rows[row] == ""):
+                self.assertEqual(segments.to_row(line, column), (row, 0), where)
+
+            rows_of_lines.setdefault(line, []).append(row_text)
+
+        self.assertEqual(["".join(rows_of_lines[line])
+                          for line in range(1, len(lines) + 1)], lines, where)
+        self.assertEqual(segments.lines, sorted(segments.lines), where)
+        self.assertEqual(segments.rows, sorted(segments.rows), where)
+
+    def test_edits_keep_the_rows_of_the_lines(self):
+        for seed in range(1500):
+            rng = random.Random(seed)
+            length = rng.choice([3, 4, 5])
+            text = "".join(rng.choice("ab\n" if rng.random() < 0.5 else "abcdefgh")
+                           for _ in range(rng.randrange(80)))
+
+            # appended in pieces, the way a file is loaded
+            segments = LineSegments(length)
+            cut = ""
+            position = 0
+            while position < len(text):
+                size = rng.randrange(1, 20)
+                cut += segments.append(text[position:position + size])
+                position += size
+            rows = cut.split("\n")
+            self._check(segments, text, rows, (seed, "append"))
+
+            for step in range(20):
+                text = self._edit(rng, segments, text, rows)
+                self._check(segments, text, rows, (seed, step))
+
+    def _edit(self, rng, segments, text, rows):
+        """
+        Replaces the text between two row positions, cutting the edited rows
+        again in `rows`. Returns the new text.
+        """
+        first_row = rng.randrange(1, len(rows) + 1)
+        first_column = rng.randrange(len(rows[first_row - 1]) + 1)
+        last_row = rng.randrange(first_row, min(len(rows), first_row + 3) + 1)
+        last_column = rng.randrange(len(rows[last_row - 1]) + 1)
+        if last_row == first_row and last_column < first_column:
+            first_column, last_column = last_column, first_column
+
+        start = _offset(text, segments.to_line(first_row, first_column))
+        end = _offset(text, segments.to_line(last_row, last_column))
+        inserted = "".join(rng.choice("xy\n" if rng.random() < 0.3 else "xyzw")
+                           for _ in range(rng.choice([0, 1, 2, 5, 15])))
+
+        # the edited rows, whole
+        length = len(rows[last_row - 1])
+        rows_start = _offset(text, segments.to_line(first_row, 0))
+        rows_end = _offset(text, segments.to_line(last_row, length))
+
+        text = text[:start] + inserted + text[end:]
+        new_rows = segments.replace(
+            first_row, last_row, length,
+            text[rows_start:rows_end + len(inserted) - (end - start)])
+        rows[first_row - 1:last_row] = new_rows.split("\n")
+
+        return text
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+### Syntax Tests
+Randomized checks of `Highlighter`: however the lines are edited and lexed
+in between, the states end up those of lexing the text from scratch.
+"""
+import random
+import unittest
+from unittest import mock
+
+import textify_core
+from textify_core import (Highlighter, tokenize_ini, tokenize_json,
+                          tokenize_log, tokenize_yaml)
+
+
+# lines each tokenizer keeps a state across (blocks, strings, tracebacks)
+LINES = {
+    tokenize_log: ["plain", "E ERROR x", "W WARN y", "  at z",
+                   "Traceback (most recent call last):", "",
+                   "10:00:00 INFO ok"],
+    tokenize_yaml: ["a: b", "c: |", "  txt", "", "   more: x", "- k: v",
+                    "d: >", "    folded", "e: 1"],
+    tokenize_json: ['{"a": 1,', '"b": "x', 'y"', '}', '[1, 2]', '"str"'],
+    tokenize_ini: ["[s]", "a = 1", "; c", "  cont", "b: 2"],
+}
+
+
+class HighlighterTest(unittest.TestCase):
+
+    def test_edits_end_as_a_fresh_lex(self):
+        for batch in (1, 3, 1000):
+            with mock.patch.object(textify_core, "SYNTAX_LEX_BATCH", batch):
+                for tokenizer, words in LINES.items():
+                    for seed in range(300):
+                        self._check_edits(tokenizer, words, random.Random(seed),
+                                          (tokenizer.__name__, batch, seed))
+
+    def _check_edits(self, tokenizer, words, rng, where):
+        lines = [rng.choice(words) for _ in range(rng.randint(1, 30))]
+
+        def get_lines(first, last):
+            return lines[first - 1:last]
+
+        highlighter = Highlighter(tokenizer)
+        highlighter.advance(get_lines, rng.randint(0, len(lines)))
+
+        for _ in range(rng.randint(1, 8)):
+            first = rng.randint(1, len(lines))
+            old_last = rng.randint(first, min(len(lines), first + 3))
+            new = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+            lines[first - 1:old_last] = new
+            highlighter.edited(first, old_last, first + len(new) - 1)
+
+            if rng.random() < 0.7:
+                # a deadline that has passed lexes one batch only
+                deadline = 1e-9 if rng.random() < 0.5 else None
+                highlighter.advance(get_lines, rng.randint(0, len(lines)),
+                                    deadline=deadline)
+
+        highlighter.advance(get_lines, len(lines))
+        fresh = Highlighter(tokenizer)
+        fresh.advance(get_lines, len(lines))
+
+        self.assertEqual(highlighter.states[:len(lines)], fresh.states, where)
+        self.assertEqual(highlighter.tokens(get_lines, 1, len(lines)),
+                         fresh.tokens(get_lines, 1, len(lines)), where)
+
+    def test_states_lexed_from_an_old_state(self):
+        # an edit before the lines lexed from the state it changed
+        lines = ["plain", "E ERROR"] + ["  at"] * 6
+
+        def get_lines(first, last):
+            return lines[first - 1:last]
+
+        highlighter = Highlighter(tokenize_log)
+        highlighter.advance(get_lines, len(lines))
+        lines[1:2] = ["E ERROR", "  at", "plain"]
+        highlighter.edited(2, 2, 4)
+        highlighter.advance(get_lines, 6)
+        lines[1:2] = ["E ERROR"]
+        highlighter.edited(2, 2, 2)
+        highlighter.advance(get_lines, 8)
+
+        fresh = Highlighter(tokenize_log)
+        fresh.advance(get_lines, len(lines))
+        self.assertEqual(highlighter.states[:8], fresh.states[:8])
+
+        highlighter.advance(get_lines, len(lines))
+        self.assertEqual(highlighter.states, fresh.states)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+### Undo Tests
+Randomized checks of `UndoHistory`: undoing every step gets back the text it
+started from, and redoing them the text it ended with, whatever the budget
+(so the archive of compressed steps is used too).
+"""
+import random
+import unittest
+
+from textify_core import UndoHistory
+
+
+def _apply(text, step, undo):
+    """Returns `text` with the edits of `step` undone (or redone)"""
+    if undo:
+        for offset, deleted, inserted in reversed(step):
+            assert text[offset:offset + len(inserted)] == inserted
+            text = text[:offset] + deleted + text[offset + len(inserted):]
+    else:
+        for offset, deleted, inserted in step:
+            assert text[offset:offset + len(deleted)] == deleted
+            text = text[:offset] + inserted + text[offset + len(deleted):]
+    return text
+
+
+class UndoHistoryTest(unittest.TestCase):
+
+    def test_undo_and_redo_everything(self):
+        for seed in range(200):
+            rng = random.Random(seed)
+            history = UndoHistory(budget=rng.choice([2000, 20000, 10 ** 9]))
+            text = ""
+
+            for _ in range(300):
+                chance = rng.random()
+                if chance < 0.1 and history.can_undo:
+                    step = history.undo()
+                    if step:
+                        text = _apply(text, step, undo=True)
+                    continue
+                if chance < 0.15 and history.can_redo:
+                    text = _apply(text, history.redo(), undo=False)
+                    continue
+                if chance < 0.18:
+                    history.begin_group()
+                elif chance < 0.2:
+                    history.end_group()
+
+                offset = rng.randint(0, len(text))
+                if chance < 0.6:
+                    deleted = ""
+                    inserted = rng.choice(["a", "b", " ", "\n", "word", "xy z"])
+                else:
+                    deleted = text[offset:offset + rng.choice([1, 1, 3])]
+                    inserted = rng.choice(["", "", "q"])
+                history.record(offset, deleted, inserted)
+                text = text[:offset] + inserted + text[offset + len(deleted):]
+
+            while history._group:
+                history.end_group()
+
+            final = text
+            undone = 0
+            step = history.undo()
+            while step is not None:
+                text = _apply(text, step, undo=True)
+                undone += 1
+                step = history.undo()
+
+            # a history within its budget goes back to the empty text
+            if history.budget > 10 ** 8:
+                self.assertEqual(text, "", seed)
+
+            for _ in range(undone):
+                text = _apply(text, history.redo(), undo=False)
+            self.assertEqual(text, final, seed)
+            self.assertGreaterEqual(history.memory, 0, seed)
+
+    def test_open_group_blocks_undo(self):
+        history = UndoHistory()
+        history.record(0, "", "a")
+        history.begin_group()
+        self.assertIsNone(history.undo())
+
+        history.end_group()
+        self.assertEqual(history.undo(), [(0, "", "a")])
+
+    def test_typing_is_undone_a_word_at_a_time(self):
+        history = UndoHistory()
+        text = ""
+        for char in "hello world":
+            history.record(len(text), "", char)
+            text += char
+
+        steps = []
+        step = history.undo()
+        while step is not None:
+            steps.append("".join(inserted for _, _, inserted in step))
+            step = history.undo()
+        self.assertEqual("".join(reversed(steps)), "hello world")
+        self.assertGreater(len(steps), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,23 +1,44 @@
+import sys
+import time
+startup_phases = [("start", time.perf_counter())]  # see '_startup_phase'
+if __name__ == "__main__" and "--batch" in sys.argv[1:]:
+    # headless find & replace (see 'textify_batch'), tkinter is never loaded.
+    # It runs as '__main__', so its worker processes don't run this script
+    import runpy
+    runpy.run_module("textify_batch", run_name="__main__", alter_sys=True)
 from tkinter import *
 from tkinter import ttk
 from tkinter import messagebox
 from tkinter import filedialog
+from tkinter import simpledialog
 from tkinter.scrolledtext import ScrolledText
-from PIL import ImageTk, Image
+startup_phases.append(("import tkinter", time.perf_counter()))
+import io
 import os
 import re
-import time
-import datetime
-import pyperclip
+import codecs
+import mmap
+import queue
+import threading
+import tempfile
+import zlib
+from itertools import islice
+from collections import deque
+from textify_core import (Document, LineStats, UndoHistory, LineIndex,
+                          FileWatcher, find_all, find_indices, search_pattern,
+                          line_starts, offsets_to_indices, expand_matches,
+                          replace_spans, read_chunks, file_mode,
+                          write_atomically, diff_texts, merge_hunks,
+                          shift_offset, Highlighter, tokenizer_for,
+                          LineSegments, longest_line)
+startup_phases.append(("import textify_core", time.perf_counter()))
 
 
 # * Custom Functions
 # ? Helper functions
 def _reset_title():
     """Reset the program's title to default"""
-    global program_title
-    program_title = "Untitled"
-    root.title(f"{program_title} - {PROGRAM_NAME}")
+    _set_title_to("Untitled")
 
 
 def _set_title_to(title):
@@ -26,6 +47,7 @@ def _set_title_to(title):
     program_title = title.replace("*", "")
 
     root.title(f"{title} - {PROGRAM_NAME}")
+    notebook.tab(current_tab["frame"], text=title)
 
 
 def _get_filename(filepath):
@@ -58,6 +80,29 @@ def _set_modified(b: bool):
     modified = b
 
 
+def _begin_undo_group():
+    """
+    ### Begin Undo Group
+    Starts a group of edits that is undone (and redone) in one step
+    """
+    undo_history.begin_group()
+
+
+def _end_undo_group():
+    """Ends the group of edits started by `_begin_undo_group`"""
+    undo_history.end_group()
+
+
+def _reset_undo(recording=True):
+    """
+    ### Reset Undo
+    Forgets the undo history of `text_area` (its text was replaced), and
+    starts (or stops, while a file is loaded) recording the edits.
+    """
+    undo_history.clear()
+    undo_history.recording = recording
+
+
 def _ask_to_save(name: str):
     """
     ### Ask to save
@@ -76,8 +121,44 @@ def _on_key_release(event=None):
     """
     # execute only if status bar is visible!!
     if toggle_status_bar.get():
-        _set_line_and_column()
-        _set_chars_and_words()
+        _schedule_statusbar_update()
+
+    # the cursor may have moved to another line
+    if toggle_highlight_active_line.get():
+        _schedule_highlight()
+
+
+def _schedule_statusbar_update():
+    """
+    ### Schedule Statusbar Update
+    Merges every pending status bar update into one. The cursor position is
+    refreshed as soon as tk is idle, the characters and words only after no
+    update has been requested for `STATS_IDLE_DELAY` milliseconds.
+    """
+    global cursor_update_job, stats_update_job
+
+    # one cursor refresh per frame, however many events came in
+    if cursor_update_job is None:
+        cursor_update_job = root.after_idle(_flush_cursor_update)
+
+    # restart the idle timer of the costly stats
+    if stats_update_job is not None:
+        root.after_cancel(stats_update_job)
+    stats_update_job = root.after(STATS_IDLE_DELAY, _flush_stats_update)
+
+
+def _flush_cursor_update():
+    """Runs the pending cursor position update"""
+    global cursor_update_job
+    cursor_update_job = None
+    _set_line_and_column()
+
+
+def _flush_stats_update():
+    """Runs the pending characters and words update"""
+    global stats_update_job
+    stats_update_job = None
+    _set_chars_and_words()
 
 
 def _get_cursor_position():
@@ -86,7 +167,17 @@ def _get_cursor_position():
     Returns the cursor's current position `(line, column)`
     """
 
-    return text_area.index(INSERT).split(".")
+    line, column = text_area.index(INSERT).split(".")
+
+    if viewer:
+        # the line in the file, not in the window
+        line = str(viewer["first"] + int(line))
+
+    if long_lines:
+        # the line and column in the file, not in the rows
+        line, column = map(str, long_lines.to_line(int(line), int(column)))
+
+    return line, column
 
 
 def _set_line_and_column():
@@ -103,22 +194,52 @@ def _get_chars_and_words():
     """
     ### Get characters and words
     returns the number of characters and words in `text_area`
+
+    Characters are counted by `document`, words are read from the per-line
+    cache kept by `_update_line_stats`, so this never copies the buffer.
     """
-    # get number of words
-    words = len(text_area.get(1.0, "end - 1 chars").split())
+    # return the number of chars and words
+    return document.length, line_stats.total
 
-    # get the number of characters
-    chars = text_area.count(1.0, "end -1 chars", 'chars')
 
-    # return the number of chars and words
-    return 0 if chars == None else chars[0], words
+def _update_line_stats(first, last, lines):
+    """
+    ### Update line stats
+    Replaces the cached stats of lines `first` to `last` (1-based, inclusive)
+    with the stats of `lines` (the new text of that span, split on newlines).
+    """
+    line_stats.update(first, last, lines)
+
+
+def _reset_document(text=""):
+    """
+    ### Reset Document
+    Makes `document` (and the line stats) hold `text`, without tracking an
+    edit. Used when `text_area`'s content is replaced behind the proxy's back.
+    """
+    global document
+
+    document = Document(text)
+    line_stats.reset(text)
 
 
 def _set_chars_and_words():
     """
     ### Set Characters and words
-    updates the characters and words in status bar
+    updates the characters and words (and the memory the undo history takes)
+    in status bar
     """
+    undo_info_label.configure(text=f"Undo: {_format_size(undo_history.memory)}")
+
+    if viewer:
+        # large files are never counted, show what is known about them
+        lines = f"{_viewer_line_count():,}"
+        if not line_index.done:
+            lines += "+"
+        chars_words_label.configure(
+            text=f"Size: {len(viewer['mmap']):,} bytes | Lines: {lines}")
+        return
+
     # get the characters and words from 'textarea'
     characters, words = _get_chars_and_words()
     # display them in statusbar
@@ -126,6 +247,26 @@ def _set_chars_and_words():
         text=f"Characters: {characters} | Words: {words}")
 
 
+def _format_size(size):
+    """Returns a number of bytes as `512 B`, `1.5 KB`, `12.3 MB`..."""
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            break
+        size /= 1024
+    else:
+        unit = "GB"
+
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+def _set_status_message(message=""):
+    """
+    ### Set Status Message
+    Shows `message` (progress, results of long commands...) in the status bar
+    """
+    status_message_label.configure(text=message)
+
+
 def _get_selection():
     """
     ### Get Selection
@@ -231,28 +372,191 @@ def _search_all_matching_strings(string, textwidget):
     starting and ending index of each string in a generator of `tuples(index1, index2)`
     """
     # * search every string matching with `string`
-    # get the required variables
-    string_length = len(string)
-    matches_found = 0
-
-    # find the 'search_string' in 'text_widget'
     if string:
-        start_pos = '1.0'
-        while True:
-            # 'search' returns the index of the first character found
-            start_pos = textwidget.search(string, start_pos, END, nocase=False)
+        # one snapshot of the text is searched, not the widget itself. The
+        # large file viewer only has the window of lines it shows
+        in_document = textwidget is text_area and not viewer
+        if in_document:
+            text = document.text()
+        else:
+            text = textwidget.get("1.0", "end - 1 chars")
+        ranges = offsets_to_indices(text, find_all(text, string))
+        yield from _display_ranges(ranges) if in_document else ranges
 
-            if not start_pos:
-                break
 
-            end_pos = f'{start_pos} + {string_length} chars'
+# ? Find functions
+def _edit_ranges(ranges, replacement=""):
+    """
+    ### Edit Ranges
+    Replaces the text of every `(index1, index2)` range in `ranges` (given as
+    `line.column` indices of `document`) with `replacement`, as a single undo step. Returns
+    the number of ranges edited.
+
+    `replacement` is either a string (`""` deletes the ranges) or a function
+    called with the text of the lines around a range and the range's offsets
+    in it, returning the new text.
+
+    All ranges are collected first and edited from the last to the first, so
+    no edit shifts the indices of the ranges left. More than
+    `EDIT_BULK_RANGES` ranges are put in `text_area` as one rewrite of the
+    lines they span instead.
+    """
+    ranges = _sorted_ranges(ranges)
+    if not ranges:
+        return 0
+
+    _begin_undo_group()
+
+    # the undo group is closed even if an edit fails, or undo stops working
+    try:
+        if len(ranges) > EDIT_BULK_RANGES:
+            _rewrite_lines(ranges, replacement)
+
+        else:
+            for index1, index2 in reversed(ranges):
+                if callable(replacement):
+                    text, offset = _lines_around([(index1, index2)])
+                    new_text = replacement(
+                        text, offset(index1), offset(index2))
+                else:
+                    new_text = replacement
+
+                index1, index2 = _display_index(index1), _display_index(index2)
+                if new_text:
+                    text_area.replace(index1, index2, new_text)
+                else:
+                    text_area.delete(index1, index2)
+    finally:
+        _end_undo_group()
+
+    return len(ranges)
+
+
+def _sorted_ranges(ranges):
+    """
+    ### Sorted Ranges
+    Returns `ranges` in document order, without the ranges overlapping the
+    ones before them
+    """
+    def position(index):
+        line, column = index.split(".")
+        return int(line), int(column)
+
+    result = []
+    for index1, index2 in sorted(ranges, key=lambda pair: position(pair[0])):
+        if result and position(index1) < position(result[-1][1]):
+            continue
+        result.append((index1, index2))
+
+    return result
+
 
-            # yield the found indices
-            yield start_pos, end_pos
+def _lines_around(ranges):
+    """
+    ### Lines around
+    Returns the text of the lines from the first to the last of `ranges` and
+    a function converting `line.column` indices to offsets in that text.
+    """
+    first = int(ranges[0][0].split(".")[0])
+    last = int(ranges[-1][1].split(".")[0])
+
+    # the lines, and where each of them starts
+    text = document.get_lines(first, last)
+    starts = line_starts(text)
+
+    def offset(index):
+        line, column = index.split(".")
+        return starts[int(line) - first] + int(column)
+
+    return text, offset
+
+
+def _rewrite_lines(ranges, replacement):
+    """
+    ### Rewrite Lines
+    Edits all `ranges` (sorted) by computing the new text of the lines they
+    span in one pass and putting it in `text_area` with a single edit.
+    """
+    text, offset = _lines_around(ranges)
+    first = ranges[0][0].split(".")[0]
+    last = ranges[-1][1].split(".")[0]
+
+    spans = [(offset(index1), offset(index2)) for index1, index2 in ranges]
+
+    # keep the cursor and the view where they were
+    insert = text_area.index(INSERT)
+    view = text_area.yview()[0]
+
+    end = f"{last}.{len(text) - offset(f'{last}.0')}"
+    text_area.replace(_display_index(f"{first}.0"), _display_index(end),
+                      replace_spans(text, spans, replacement))
+
+    text_area.mark_set(INSERT, insert)
+    text_area.yview_moveto(view)
+
+
+def _display_index(index):
+    """
+    Returns the `text_area` index of a `line.column` index of `document`,
+    they differ when long lines are shown in rows (see `_start_long_lines`)
+    """
+    if not long_lines:
+        return index
+
+    line, column = index.split(".")
+    return "%d.%d" % long_lines.to_row(int(line), int(column))
+
+
+def _document_index(index):
+    """Returns the `document` index of a resolved `text_area` index"""
+    if not long_lines:
+        return index
+
+    row, column = index.split(".")
+    return "%d.%d" % long_lines.to_line(int(row), int(column))
+
+
+def _display_ranges(ranges):
+    """
+    ### Display Ranges
+    Returns the `(index1, index2)` ranges of `document` (`line.column`
+    indices) as ranges of `text_area`, which shows long lines in rows, see
+    `_start_long_lines`
+    """
+    if not long_lines:
+        return ranges
+
+    return ((_display_index(index1), _display_index(index2))
+            for index1, index2 in ranges)
+
+
+def _selected_ranges():
+    """Returns the `(index1, index2)` ranges of the selection, as indices of `document`"""
+    indices = [_document_index(str(index)) for index in text_area.tag_ranges(SEL)]
+    return list(zip(indices[::2], indices[1::2]))
+
+
+def _tag_add_ranges(tagname, ranges):
+    """
+    ### Tag add ranges
+    Adds `tagname` to all `(index1, index2)` ranges, `TAG_BATCH_SIZE` ranges
+    per tcl call instead of one call per range. Returns the number of ranges.
+    """
+    count = 0
+    batch = []
 
-            matches_found += 1
-            # set the start_pos for next iter. to current end_pos
-            start_pos = end_pos
+    for indices in ranges:
+        batch.extend(indices)
+        count += 1
+
+        if len(batch) >= TAG_BATCH_SIZE * 2:
+            text_area.tag_add(tagname, *batch)
+            batch.clear()
+
+    if batch:
+        text_area.tag_add(tagname, *batch)
+
+    return count
 
 
 def _get_tag_words(tagname, textwidget, startpos, endpos):
@@ -301,117 +605,1815 @@ def _show_text_window(parent, data, title):
     text_win.rowconfigure(0, weight=1)
 
 
-# ? Context menu Functions
-def _show_context_menu(event):
+# ? Edit tracking functions
+def _install_edit_proxy(widget):
     """
-    ### Show Context Menu
-    Displays context menu in the text area
+    ### Install Edit Proxy
+    Renames `widget`'s tcl command and puts `_text_proxy` in its place, so every
+    `insert`, `delete` and `replace` (from key bindings, undo/redo, paste or our
+    own commands) passes through python before reaching the widget.
     """
-    context_menu.tk_popup(event.x_root, event.y_root)
+    widget_cmd = str(widget)
+    original_cmd = f"{widget_cmd}_original"
 
+    widget.tk.call("rename", widget_cmd, original_cmd)
+    widget.tk.createcommand(
+        widget_cmd, lambda *args: _text_proxy(widget, original_cmd, *args))
 
-# ? Menu Functions
-def _new(event=None):
+
+def _remove_edit_proxy(widget):
+    """Deletes the python command `_install_edit_proxy` gave the (destroyed) `widget`"""
+    widget.tk.deletecommand(str(widget))
+
+
+def _text_proxy(widget, original_cmd, operation, *args):
     """
-    ### New file
-    Open a new file in the editor
+    ### Text Proxy
+    Forwards a widget command to the original tcl command. Edits are mirrored
+    in `document` and the span of lines they touched is handed to
+    `_on_text_edited`. In the long line mode, `_edit_long_lines` makes them.
     """
-    global current_path
+    call = widget.tk.call
 
-    if modified:
-        # file is modified, ask to save first
-        answer = _ask_to_save(program_title)
+    if operation not in ("insert", "delete", "replace") or not track_edits:
+        return call(original_cmd, operation, *args)
 
-        if answer == None:
-            # ? user cancelled! (Do nothing)
-            return
+    if str(call(original_cmd, "cget", "-state")) == DISABLED:
+        # tk ignores the edits of a read-only text
+        return ""
 
-        elif answer:
-            # * Save
-            # user agreed! (Save)
-            if not current_path:
-                # get the filepath
-                current_path = filedialog.asksaveasfilename(
-                    defaultextension=".txt", confirmoverwrite=True,
-                    filetypes=[("Text Documents", "*.txt"), ("All Files", "*.*")])
+    if paste_job and not paste_job["inserting"]:
+        # the text is read-only until the paste is done, see '_start_paste'
+        return ""
 
-            # get the content
-            content = text_area.get("1.0", "end - 1 chars")
+    def resolve(index):
+        return str(call(original_cmd, "index", index))
 
-            # save the content in current_path
-            with open(current_path, "w") as newfile:
-                newfile.write(content)
+    # resolve the indices before the edit moves them
+    if operation == "insert":
+        indices = [resolve(args[0])]
+        args = (indices[0],) + args[1:]
+    elif operation == "replace":
+        indices = [resolve(args[0]), resolve(args[1])]
+        args = tuple(indices) + args[2:]
+    else:
+        if len(args) % 2:
+            # a single index deletes one character, which may be a newline
+            args += (f"{args[-1]} + 1 chars",)
+        indices = [resolve(index) for index in args]
+        args = tuple(indices)
 
-    # * finalizing stuff
-    # clear the text_widget
-    text_area.delete("1.0", END)
+    if long_lines:
+        # the rows of long lines are not the document's lines
+        _on_text_edited(*_edit_long_lines(operation, indices, args))
+        return ""
 
-    # set modified to false
-    _set_modified(False)
+    result = call(original_cmd, operation, *args)
 
-    # reset current_path
-    current_path = ""
+    # the span of lines the edit touched, before and after the edit
+    lines_before = document.line_count
+    lines = [int(index.split(".")[0]) for index in indices]
+    first, last = min(min(lines), lines_before), min(max(lines), lines_before)
 
-    # reset the title
-    _reset_title()
+    _mirror_edit(operation, args)
+
+    new_last = last + document.line_count - lines_before
+    _on_text_edited(first, last, new_last)
+
+    return result
+
+
+def _mirror_edit(operation, args):
+    """
+    ### Mirror Edit
+    Applies an `insert`, `delete` or `replace` widget command (with resolved
+    indices) to `document`, and records it in `undo_history`. Returns the
+    `(start, end, length)` of the edits made, in order: the text between
+    offsets `start` and `end` was replaced with `length` characters.
+    """
+    def offset(index):
+        line, column = index.split(".")
+        return document.offset(int(line), int(column))
+
+    if operation in ("delete", "replace"):
+        count = 2 if operation == "replace" else len(args)
+        ranges = sorted((offset(args[i]), offset(args[i + 1]))
+                        for i in range(0, count, 2))
+
+        # like tk, merge the overlapping ranges and delete from the end
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        if operation == "replace":
+            start, end = merged[0]
+            inserted = "".join(args[2::2])
+            undo_history.record(start, document.get(start, end), inserted)
+            document.delete(start, end)
+            document.insert(start, inserted)
+            return [(start, end, len(inserted))]
+
+        # the ranges of a single command are undone together
+        if len(merged) > 1:
+            undo_history.begin_group()
+        for start, end in reversed(merged):
+            undo_history.record(start, document.get(start, end), "")
+            document.delete(start, end)
+        if len(merged) > 1:
+            undo_history.end_group()
+        return [(start, end, 0) for start, end in reversed(merged)]
+
+    start, inserted = offset(args[0]), "".join(args[1::2])
+    undo_history.record(start, "", inserted)
+    document.insert(start, inserted)
+    return [(start, start, len(inserted))]
+
+
+def _on_text_edited(first, old_last, new_last):
+    """
+    ### On Text Edited
+    Called after every edit. Lines `first` to `old_last` (before the edit) are
+    now lines `first` to `new_last`.
+    """
+    # only the touched lines are read, from the document
+    _update_line_stats(first, old_last,
+                       document.get_lines(first, new_last).split("\n"))
+
+    if syntax:
+        # the lines after may end in other states, the view is tagged again
+        syntax["highlighter"].edited(first, old_last, new_last)
+        syntax["tagged"] = None
+        _schedule_syntax()
+
+
+# ? Tab functions
+def _new_tab(event=None):
+    """
+    ### New Tab
+    Opens an empty document in a new tab and switches to it.
+
+    Every tab owns the state of its document (`TAB_VARIABLES`). The state of
+    the active tab lives in the module's globals, so the rest of the editor
+    works on `text_area`, `document`, `current_path`... as it always did.
+    """
+    frame = ttk.Frame(notebook)
+    tab = {
+        "frame": frame,
+        "used": time.monotonic(),  # when the tab was last active
+        "hibernated": None,  # file holding the text of a hibernated tab
+        "view": None,  # cursor and scroll position of a hibernated tab
+        "current_path": "",
+        "modified": False,
+        "program_title": "Untitled",
+        "document": Document(),
+        "line_stats": LineStats(),
+        "undo_history": UndoHistory(UNDO_MEMORY_BUDGET),
+        "line_index": None,
+        "file_watch": None,
+        "viewer": None,
+        "long_lines": None,
+        "follow": None,
+        "syntax": None,
+        "file_load": None,
+        "paste_job": None,
+        "track_edits": True,
+        "context_menu": None,
+    }
+    tab.update(_create_text_area(frame))
+
+    tabs.append(tab)
+    notebook.add(frame, text=tab["program_title"])
+    _select_tab(tab)
+
+    return "break"
+
+
+def _create_text_area(parent):
+    """
+    ### Create Text Area
+    Creates the text widget (and its scrollbars) of a tab in `parent`.
+    Returns them as a dict of tab variables.
+    """
+    widget = Text(parent, wrap="word", undo=False)
+    widget.grid(row=0, column=0, sticky=(W, E, S, N))
+    widget.configure(background="#eeeeee", relief="flat", padx=8, pady=4)
+    # text's styling
+    widget.configure(font=("Segoe UI", 20),)
+    # cursor's styling
+    widget.configure(insertbackground="#505050", insertwidth=1)
+    widget.tag_config("active_line", background="#dddddd")
+    # Selection tag config
+    widget.tag_configure("sel", background="#15a1ff", foreground="white")
+    # syntax tags, below the selection
+    for kind, color in SYNTAX_COLORS.items():
+        widget.tag_configure(f"syntax_{kind}", foreground=color)
+    widget.tag_raise("sel")
+    _install_edit_proxy(widget)
+    _bind_text_area(widget)
+
+    # * scroll bar  -> Vertical
+    vertical = ttk.Scrollbar(parent, orient="vertical", command=widget.yview)
+    vertical.grid(row=0, column=1, sticky=(N, E, S))
+    widget.config(yscrollcommand=_yscroll_command(vertical))
+
+    # * scroll bar  -> Horizontal
+    horizontal = ttk.Scrollbar(
+        parent, orient="horizontal", command=widget.xview)
+    horizontal.grid(row=1, column=0, sticky=(S, E, W))
+    widget.config(xscrollcommand=horizontal.set)
+
+    parent.columnconfigure(0, weight=1)
+    parent.rowconfigure(0, weight=1)
+
+    return {"text_area": widget, "scrollbar": vertical,
+            "scrollbar_horizon": horizontal}
+
+
+def _bind_text_area(widget):
+    """
+    ### Bind Text Area
+    Binds the editor's keys and events to the text `widget` of a tab
+    """
+    widget.bind("<Key>", _modified)
+    widget.bind("<<Modified>>", _modified)
+    widget.bind("<<update-statusbar>>", _on_key_release)
+
+    # cancel a running file load or paste
+    widget.bind("<Escape>", _cancel_load)
+    widget.bind("<Escape>", _cancel_paste, add="+")
+
+    # context menu
+    widget.bind("<App>", _show_context_menu)  # for keyboard
+    widget.bind("<Button-3>", _show_context_menu)  # for mouse
+
+    # file menu
+    widget.bind("<Control-n>", _new)
+    widget.bind("<Control-N>", _new)
+    widget.bind("<Control-o>", _open)
+    widget.bind("<Control-O>", _open)
+    widget.bind("<Control-s>", _save)
+    widget.bind("<Control-S>", _save)
+    widget.bind("<Control-Shift-s>", _save_as)
+    widget.bind("<Control-Shift-S>", _save_as)
+    widget.bind("<Control-Shift-f>", _file_properties)
+    widget.bind("<Control-Shift-F>", _file_properties)
+
+    # edit menu
+    widget.bind("<Control-z>", _undo)
+    widget.bind("<Control-Z>", _undo)
+    widget.bind("<Control-Y>", _redo)
+    widget.bind("<Control-y>", _redo)
+    widget.bind("<<Undo>>", _undo)
+    widget.bind("<<Redo>>", _redo)
+    widget.bind("<Control-X>", _cut)
+    widget.bind("<Control-x>", _cut)
+    widget.bind("<Control-c>", _copy)
+    widget.bind("<Control-C>", _copy)
+    widget.bind("<Control-v>", _paste)
+    widget.bind("<Control-V>", _paste)
+    widget.bind("<Delete>", _delete_selection)
+    widget.bind("<Control-Shift-k>", _delete_current_line)
+    widget.bind("<Control-Shift-K>", _delete_current_line)
+    widget.bind("<Control-Shift-Delete>", _delete_all)
+    widget.bind("<Control-F>", _find_replace_dialog)
+    widget.bind("<Control-f>", _find_replace_dialog)
+    widget.bind("<Control-g>", _go_to_line)
+    widget.bind("<Control-G>", _go_to_line)
+    widget.bind("<KeyPress-F5>", _time_date)
+
+    # selection menu
+    widget.bind("<Control-a>", _select_all)
+    widget.bind("<Control-Shift-l>", _select_all_occurrences)
+    widget.bind("<Control-Shift-L>", _select_all_occurrences)
+    widget.bind("<Control-l>", _select_current_line)
+    widget.bind("<Control-L>", _select_current_line)
+
+    # view menu
+    # widget.bind("<Alt-z>", _word_wrap)
+    # widget.bind("<Alt-Z>", _word_wrap)
+    # widget.bind("<Alt-h>", _highlight_active_line)
+    # widget.bind("<Alt-H>", _highlight_active_line)
+    widget.bind("<KeyPress-F11>", _fullscreen)
+
+    # tools menu
+    widget.bind("<Control-Shift-p>", _prefs)
+    widget.bind("<Control-Shift-P>", _prefs)
+
+    # help menu
+    widget.bind("<KeyPress-F1>", _about)
+
+    # tabs
+    widget.bind("<Control-t>", _new_tab)
+    widget.bind("<Control-T>", _new_tab)
+    widget.bind("<Control-w>", _close_tab)
+    widget.bind("<Control-W>", _close_tab)
+    widget.bind("<Control-Tab>", _next_tab)
+    widget.bind("<Control-Shift-Tab>", _previous_tab)
+
+
+def _select_tab(tab):
+    """Switches to `tab`"""
+    notebook.select(tab["frame"])
+    _on_tab_changed()
+
+
+def _next_tab(event=None):
+    """Switches to the tab on the right (or the first one)"""
+    _select_tab(tabs[(tabs.index(current_tab) + 1) % len(tabs)])
+    return "break"
+
+
+def _previous_tab(event=None):
+    """Switches to the tab on the left (or the last one)"""
+    _select_tab(tabs[tabs.index(current_tab) - 1])
+    return "break"
+
+
+def _on_tab_changed(event=None):
+    """
+    ### On Tab Changed
+    Puts the state of the tab selected in `notebook` in the globals, after
+    storing the state of the previous one (see `_leave_tab`). A hibernated
+    tab is restored first.
+    """
+    global current_tab
+
+    tab = next((tab for tab in tabs
+                if str(tab["frame"]) == str(notebook.select())), None)
+    if tab is None or tab is current_tab:
+        return
+
+    if current_tab:
+        _leave_tab()
+
+    if tab["hibernated"]:
+        _restore_tab(tab)
+
+    current_tab = tab
+    tab["used"] = time.monotonic()
+    globals().update({name: tab[name] for name in TAB_VARIABLES})
+
+    # the jobs paused by '_leave_tab' go on
+    if file_load:
+        file_load["job"] = root.after(LOAD_POLL_INTERVAL, _poll_file_load)
+    if paste_job:
+        paste_job["job"] = root.after_idle(_poll_paste)
+    if file_watch:
+        file_watch["job"] = root.after(WATCH_CHECK_INTERVAL, _poll_file_watch)
+    if follow:
+        follow["job"] = root.after_idle(_poll_follow)
+    toggle_follow.set(bool(follow))
+    if syntax:
+        syntax["job"] = root.after_idle(_highlight_syntax)
+
+    # the view options apply to every tab
+    _word_wrap()
+    _toggle_highlight()
+
+    root.title(f"{notebook.tab(tab['frame'], 'text')} - {PROGRAM_NAME}")
+    _set_status_message()
+    if viewer:
+        _poll_viewer_index()
+
+    text_area.focus_set()
+    text_area.event_generate("<<update-statusbar>>")
+
+    _hibernate_tabs()
+
+
+def _leave_tab():
+    """
+    ### Leave Tab
+    Stores the globals in the active tab and pauses its jobs, which would
+    otherwise work on the next tab's widgets. A paused file load waits in its
+    (bounded) queue.
+    """
+    if file_load and file_load["job"]:
+        root.after_cancel(file_load["job"])
+        file_load["job"] = None
+
+    if paste_job:
+        root.after_cancel(paste_job["job"])
+        paste_job["job"] = None
+
+    if file_watch and file_watch["job"]:
+        root.after_cancel(file_watch["job"])
+        file_watch["job"] = None
+
+    if follow and follow["job"]:
+        root.after_cancel(follow["job"])
+        follow["job"] = None
+
+    if syntax and syntax["job"]:
+        root.after_cancel(syntax["job"])
+        syntax["job"] = None
+
+    if viewer:
+        for job in ("index_job", "recenter_job"):
+            if viewer[job]:
+                root.after_cancel(viewer[job])
+                viewer[job] = None
+
+    current_tab.update({name: globals()[name] for name in TAB_VARIABLES})
+
+
+def _confirm_close():
+    """
+    ### Confirm Close
+    Asks to save the active tab when modified, before it's closed (see
+    `_close_document`) or its text is replaced. Returns `False` if the user cancelled, or the
+    document wasn't saved after all (e.g. the save dialog was cancelled).
+    """
+    if not modified:
+        return True
+
+    # popup a (file save) dialog
+    answer = _ask_to_save(program_title)
+
+    if answer == None:
+        # ? user cancelled! (Do nothing)
+        return False
+
+    if answer:
+        # save (a paste in progress is stopped, a partly loaded file is
+        # detached first, it's saved elsewhere)
+        _cancel_paste()
+        _cancel_load()
+        _save()
+
+        # the save is written in the background, the document may only go
+        # once it's on disk ('_poll_save' reports a failed one)
+        return not modified and _wait_for_save()
+
+    return True
+
+
+def _close_document():
+    """
+    ### Close Document
+    Gets the active tab ready to be closed, once `_confirm_close` agreed:
+    stops everything still running on it.
+    """
+    # stop a paste that is still being inserted
+    _cancel_paste()
+    _stop_follow()
+
+    # stop a file that is still loading
+    _cancel_load(keep_partial=False)
+
+    # release the memory mapped file
+    _close_viewer()
+    _stop_long_lines()
+    _stop_line_index()
+    _stop_file_watch()
+    _stop_syntax()
+
+
+def _close_tab(event=None):
+    """
+    ### Close Tab
+    Closes the active tab, asking to save it first. Closing the last tab
+    leaves an empty one.
+    """
+    global current_tab
+
+    if not _confirm_close():
+        return "break"
+    _close_document()
+
+    tab, current_tab = current_tab, None
+    index = tabs.index(tab)
+    tabs.remove(tab)
+
+    # the notebook drops the tab of a destroyed frame
+    widget = tab["text_area"]
+    tab["frame"].destroy()
+    _remove_edit_proxy(widget)
+
+    if tabs:
+        # the tab that took its place
+        _select_tab(tabs[min(index, len(tabs) - 1)])
+    else:
+        _new_tab()
+
+    return "break"
+
+
+def _hibernate_tabs():
+    """
+    ### Hibernate Tabs
+    Hibernates the least recently used inactive tabs until the text the
+    inactive tabs keep in memory fits in `TAB_MEMORY_BUDGET` characters.
+    """
+    awake = [tab for tab in tabs
+             if tab is not current_tab and not tab["hibernated"]]
+    in_memory = sum(tab["document"].length for tab in awake)
+
+    for tab in sorted(awake, key=lambda tab: tab["used"]):
+        if in_memory <= TAB_MEMORY_BUDGET:
+            break
+
+        # busy tabs are left alone, so are large files (already memory mapped)
+        if tab["viewer"] or tab["follow"] or tab["file_load"] or \
+                tab["paste_job"] or (tab["file_watch"] and tab["file_watch"]["reload"]):
+            continue
+
+        length = tab["document"].length
+        if _hibernate_tab(tab):
+            in_memory -= length
+
+
+def _hibernate_tab(tab):
+    """
+    ### Hibernate Tab
+    Writes the text of the inactive `tab` to a compressed temporary file and
+    releases its widgets and `Document`, see `_restore_tab`. Returns `False`
+    if the file couldn't be written. Its undo history is kept, compressed.
+    """
+    widget = tab["text_area"]
+    tab["view"] = (widget.index(INSERT), widget.yview()[0])
+
+    try:
+        handle, path = tempfile.mkstemp(prefix="textify-", suffix=".tab")
+    except OSError:
+        return False
+
+    try:
+        compressor = zlib.compressobj(TAB_COMPRESS_LEVEL)
+        with os.fdopen(handle, "wb") as file:
+            for chunk in tab["document"].chunks(SAVE_CHUNK_SIZE):
+                file.write(compressor.compress(
+                    chunk.encode("utf-8", "surrogatepass")))
+            file.write(compressor.flush())
+    except OSError:
+        os.remove(path)
+        return False
+
+    for child in tab["frame"].winfo_children():
+        child.destroy()
+    _remove_edit_proxy(widget)
+
+    tab["undo_history"].compress()
+    if tab["syntax"]:
+        # the new widgets are tagged again, the lexed states stay
+        tab["syntax"]["tagged"] = None
+    if tab["file_watch"]:
+        # changes made meanwhile can only be merged into an unmodified text
+        tab["file_watch"]["base"] = None
+    tab.update(hibernated=path, document=None, text_area=None,
+               scrollbar=None, scrollbar_horizon=None, context_menu=None)
+    return True
+
+
+def _restore_tab(tab):
+    """
+    ### Restore Tab
+    Brings a hibernated `tab` back: new widgets, its text, cursor and scroll
+    position.
+    """
+    path, tab["hibernated"] = tab["hibernated"], None
+
+    try:
+        with open(path, "rb") as file:
+            text = zlib.decompress(file.read()).decode("utf-8", "surrogatepass")
+        os.remove(path)
+    except (OSError, zlib.error) as error:
+        messagebox.showerror(
+            PROGRAM_NAME, f"Could not restore {tab['program_title']}\n{error}")
+        text = ""
+        tab["undo_history"].clear()
+
+    tab.update(_create_text_area(tab["frame"]))
+    widget = tab["text_area"]
+
+    # straight to the widget, the document is made from the same text
+    rows = text
+    if tab["long_lines"]:
+        tab["long_lines"] = LineSegments(LONG_LINE_LENGTH)
+        rows = tab["long_lines"].append(text)
+    widget.tk.call(f"{widget}_original", "insert", "1.0", rows)
+    widget.edit_modified(tab["modified"])
+    tab["document"] = Document(text)
+    if tab["file_watch"] and not tab["modified"]:
+        tab["file_watch"]["base"] = tab["document"].snapshot()
+
+    insert, top = tab["view"]
+    widget.mark_set(INSERT, insert)
+    widget.yview_moveto(top)
+    tab["view"] = None
+
+
+# ? Line index functions
+def _start_line_index(path):
+    """
+    ### Start Line Index
+    Makes `line_index` the `LineIndex` of `path`, where any of its lines
+    starts, for the viewer (see `_open_viewer`). A saved index is used when the file hasn't changed since,
+    otherwise it is built by a worker thread.
+    """
+    global line_index
+
+    _stop_line_index()
+
+    line_index = LineIndex(path)
+    line_index.start()
+
+
+def _stop_line_index():
+    """Stops building the current `line_index` and forgets it"""
+    global line_index
+
+    if line_index:
+        line_index.cancel()
+    line_index = None
+
+
+# ? File watch functions
+def _watch_file(path, base):
+    """
+    ### Watch File
+    Starts a `FileWatcher` on `path` and returns the state of the watch.
+    `base` is a snapshot of what `path` held when it was loaded or saved,
+    the changes of other programs are found by diffing the file against it.
+    """
+    watcher = FileWatcher(path, WATCH_POLL_INTERVAL / 1000)
+    watcher.start()
+
+    return {"watcher": watcher, "base": base, "reload": None, "job": None}
+
+
+def _start_file_watch(path, base):
+    """Watches `path` (the file of the active tab), see `_watch_file`"""
+    global file_watch
+
+    _stop_file_watch()
+
+    file_watch = _watch_file(path, base)
+    file_watch["job"] = root.after(WATCH_CHECK_INTERVAL, _poll_file_watch)
+
+
+def _stop_file_watch():
+    """Stops watching the file of the active tab"""
+    global file_watch
+
+    if file_watch:
+        file_watch["watcher"].stop()
+        if file_watch["job"]:
+            root.after_cancel(file_watch["job"])
+    file_watch = None
+
+
+def _poll_file_watch():
+    """
+    ### Poll File Watch
+    Starts reading the watched file once another program changed it (unless
+    the document is busy loading, pasting or saving), and patches the
+    document once it's read, see `_reload_worker`.
+    """
+    file_watch["job"] = None
+    reload = file_watch["reload"]
+
+    if reload and reload["done"]:
+        file_watch["reload"] = None
+        _apply_reload(reload)
+
+    elif (not reload and file_watch["watcher"].changed.is_set() and
+          not (file_load or paste_job or save_job)):
+        _start_reload()
+
+    file_watch["job"] = root.after(WATCH_CHECK_INTERVAL, _poll_file_watch)
+
+
+def _start_reload():
+    """Reads the changed file on a worker thread, see `_reload_worker`"""
+    watcher = file_watch["watcher"]
+    watcher.acknowledge()
+    name = _get_filename(watcher.path)
+
+    if watcher.signature is None:
+        _set_status_message(f"{name} was deleted by another program")
+        return
+
+    if file_watch["base"] is None:
+        # what the file held isn't known anymore, nothing can be merged
+        _set_status_message(f"{name} was changed by another program")
+        return
+
+    reload = {"base": file_watch["base"], "text": None, "hunks": None,
+              "error": None, "done": False}
+    threading.Thread(target=_reload_worker, daemon=True,
+                     args=(watcher.path, reload)).start()
+    file_watch["reload"] = reload
+
+
+def _reload_worker(path, reload):
+    """
+    ### Reload Worker
+    Worker thread of `_start_reload`. Reads the file at `path` and diffs it
+    against the text it held before (`diff_texts`).
+    """
+    try:
+        reload["text"] = "".join(text for text, _ in read_chunks(path))
+        reload["hunks"] = diff_texts(reload["base"].text(), reload["text"])
+    except (OSError, UnicodeDecodeError) as error:
+        reload["error"] = error
+
+    reload["done"] = True
+
+
+def _apply_reload(reload):
+    """
+    ### Apply Reload
+    Patches the changes another program made to the watched file into the
+    document. Unsaved edits are kept: the changes are merged with them
+    (`merge_hunks`), and where both touch the same text, the edit wins.
+    """
+    name = _get_filename(file_watch["watcher"].path)
+
+    if reload["error"]:
+        _set_status_message(f"Could not reload {name}")
+        return
+
+    base = reload["base"].text()
+    edits = diff_texts(base, document.text())
+    patch, conflicts = merge_hunks(reload["hunks"], edits)
+
+    _patch_document(patch)
+
+    if edits:
+        file_watch["base"] = Document(reload["text"]).snapshot()
+    else:
+        # the document is the file again
+        file_watch["base"] = document.snapshot()
+        text_area.edit_modified(False)
+        _set_modified(False)
+        _set_title_to(_get_filename(current_path))
+
+    message = f"Reloaded {name}: {len(patch):,} changed regions"
+    if conflicts:
+        message += f", {conflicts:,} left out for your unsaved edits"
+    _set_status_message(message)
+    text_area.event_generate("<<update-statusbar>>")
+
+
+def _patch_document(patch):
+    """
+    ### Patch Document
+    Applies `patch` (`(start, end, text)` hunks, in order) to `text_area` as
+    a single undo step, keeping the cursor and the view on the same text.
+    """
+    if not patch:
+        return
+
+    def offset(index):
+        index = _document_index(text_area.index(index))
+        return document.offset(*map(int, index.split(".")))
+
+    def index(offset):
+        return _display_index("%d.%d" % document.index(offset))
+
+    cursor, top = offset(INSERT), offset("@0,0")
+
+    # from the end, so the offsets of the other hunks don't move
+    _begin_undo_group()
+    for start, end, text in reversed(patch):
+        text_area.replace(index(start), index(end), text)
+    _end_undo_group()
+
+    text_area.mark_set(INSERT, index(shift_offset(cursor, patch)))
+    text_area.yview(index(shift_offset(top, patch)))
+
+
+def _go_to_line(event=None):
+    """
+    ### Go to Line
+    Asks for a line number and moves the cursor to it
+    """
+    if viewer:
+        last_line = _viewer_line_count()
+    elif long_lines:
+        last_line = document.line_count
+    else:
+        last_line = int(text_area.index("end - 1 chars").split(".")[0])
+
+    line = simpledialog.askinteger(
+        "Go to Line", f"Line number (1 - {last_line}):", parent=root,
+        minvalue=1, maxvalue=last_line)
+
+    if line is None:
+        return "break"
+
+    if viewer:
+        # bring the line into the window first
+        _viewer_show(line - 1 - VIEWER_WINDOW_LINES // 2, line - 1)
+        line -= viewer["first"]
+
+    if long_lines:
+        # the row the line starts at
+        line = long_lines.to_row(line)[0]
+
+    text_area.mark_set(INSERT, f"{line}.0")
+    text_area.see(INSERT)
+    text_area.focus_set()
+    text_area.event_generate("<<update-statusbar>>")
+
+    return "break"
+
+
+# ? Large file viewer functions
+def _open_viewer(path):
+    """
+    ### Open Viewer
+    Opens `path` in the read-only large file mode.
+
+    The file is memory mapped and only `VIEWER_WINDOW_LINES` lines around the
+    view are put in `text_area`. The window moves as the user scrolls and the
+    scrollbar is mapped to the lines of the whole file, so memory use doesn't
+    grow with the size of the file.
+    """
+    global viewer, track_edits
+
+    # stop a load that is still running
+    _cancel_load(keep_partial=False)
+    _stop_file_watch()
+    _stop_syntax()
+
+    file = open(path, "rb")
+    viewer = {
+        "path": path,
+        "file": file,
+        "mmap": mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ),
+        "first": 0,  # first line (0-based) of the window
+        "count": 0,  # lines in the window
+        "index_job": None,
+        "recenter_job": None,
+    }
+
+    # the window is not part of the document, don't track it
+    track_edits = False
+    text_area.delete("1.0", END)
+    _reset_undo(recording=False)
+    text_area.edit_modified(False)
+    _set_modified(False)
+
+    # map the scrollbar to the lines of the file
+    text_area.configure(yscrollcommand=_viewer_yscroll)
+    scrollbar.configure(command=_viewer_yview)
+
+    _set_title_to(f"{_get_filename(path)} (read-only)")
+
+    # the window is positioned by the line index of the file
+    _start_line_index(path)
+    _poll_viewer_index()
+
+
+def _close_viewer():
+    """
+    ### Close Viewer
+    Leaves the large file mode (if active) and clears `text_area`
+    """
+    global viewer, track_edits
+
+    if not viewer:
+        return
+
+    for job in (viewer["index_job"], viewer["recenter_job"]):
+        if job:
+            root.after_cancel(job)
+
+    viewer["mmap"].close()
+    viewer["file"].close()
+    viewer = None
+
+    # back to a normal, empty document
+    text_area.configure(state=NORMAL)
+    text_area.delete("1.0", END)
+    _reset_undo()
+    _reset_document()
+    track_edits = True
+
+    text_area.configure(yscrollcommand=_yscroll_command(scrollbar))
+    scrollbar.configure(command=text_area.yview)
+    _set_status_message()
+
+
+def _poll_viewer_index():
+    """
+    ### Poll Viewer Index
+    Follows the line index of the viewed file while it is being built, filling
+    up the window and the status bar as lines are found.
+    """
+    viewer["index_job"] = None
+
+    # fill up a window that is still short of lines
+    if viewer["count"] < VIEWER_WINDOW_LINES:
+        top = int(text_area.index("@0,0").split(".")[0]) - 1
+        _viewer_show(viewer["first"], viewer["first"] + top)
+
+    if line_index.done:
+        _set_status_message()
+    else:
+        percent = line_index.scanned * 100 // max(line_index.size, 1)
+        _set_status_message(f"Indexing lines {percent}%")
+        viewer["index_job"] = root.after(
+            VIEWER_INDEX_POLL_INTERVAL, _poll_viewer_index)
+
+    text_area.event_generate("<<update-statusbar>>")
+
+
+def _viewer_line_count():
+    """Returns the number of lines of the viewed file that are indexed"""
+    return line_index.line_count
+
+
+def _viewer_get_lines(first, last):
+    """Returns lines `first` to `last` (0-based, exclusive) of the viewed file"""
+    if last <= first:
+        return ""
+
+    data = viewer["mmap"]
+    start = line_index.line_offset(data, first)
+    if last < line_index.starts:
+        end = line_index.line_offset(data, last) - 1
+    else:
+        end = len(data)
+
+    text = data[start:end].decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").removesuffix("\r")
+
+
+def _viewer_show(first, top_line=None):
+    """
+    ### Viewer Show
+    Puts the window of lines starting at line `first` (0-based) in `text_area`
+    and scrolls `top_line` to the top of the view. The cursor keeps its line.
+    """
+    total = _viewer_line_count()
+    first = max(0, min(first, total - VIEWER_WINDOW_LINES))
+    last = min(first + VIEWER_WINDOW_LINES, total)
+
+    # remember the cursor's line in the file
+    line, column = text_area.index(INSERT).split(".")
+    insert_line = viewer["first"] + int(line) - 1
+
+    text_area.configure(state=NORMAL)
+    text_area.delete("1.0", END)
+    text_area.insert("1.0", _viewer_get_lines(first, last))
+    text_area.configure(state=DISABLED)
+    viewer["first"], viewer["count"] = first, last - first
+
+    if top_line is not None:
+        text_area.yview(f"{top_line - first + 1}.0")
+    if first <= insert_line < last:
+        text_area.mark_set(INSERT, f"{insert_line - first + 1}.{column}")
+    else:
+        text_area.mark_set(INSERT, "@0,0")
+
+
+def _viewer_yscroll(first, last):
+    """
+    ### Viewer yscroll
+    `yscrollcommand` of `text_area` in large file mode. Maps the view to the
+    lines of the whole file and moves the window before the view reaches it's
+    edges.
+    """
+    if not viewer:
+        # a late call from a tab that is no longer active
+        return
+
+    top = int(text_area.index("@0,0").split(".")[0]) - 1
+    bottom = int(text_area.index(
+        f"@0,{text_area.winfo_height()}").split(".")[0])
+    total = max(_viewer_line_count(), 1)
+
+    first_line = viewer["first"]
+    scrollbar.set((first_line + top) / total, (first_line + bottom) / total)
+
+    near_top = top < VIEWER_MARGIN and first_line > 0
+    near_bottom = (bottom > viewer["count"] - VIEWER_MARGIN and
+                   first_line + viewer["count"] < total)
+
+    if (near_top or near_bottom) and not viewer["recenter_job"]:
+        viewer["recenter_job"] = root.after_idle(_viewer_recenter)
+
+
+def _viewer_recenter():
+    """Centers the window of lines around the top line of the view"""
+    viewer["recenter_job"] = None
+    top_line = viewer["first"] + int(text_area.index("@0,0").split(".")[0]) - 1
+    _viewer_show(top_line - VIEWER_WINDOW_LINES // 2, top_line)
+
+
+def _viewer_yview(*args):
+    """
+    ### Viewer yview
+    Scrollbar command in large file mode, `moveto` jumps to a line of the
+    whole file.
+    """
+    if args[0] == "moveto":
+        top_line = int(float(args[1]) * _viewer_line_count())
+        _viewer_show(top_line - VIEWER_WINDOW_LINES // 2, top_line)
+    else:
+        # 'scroll' moves within the window, _viewer_yscroll follows up
+        text_area.yview(*args)
+
+
+# ? Long line functions
+def _start_long_lines():
+    """
+    ### Start Long Lines
+    Switches the file being loaded to the long line mode, once a line longer
+    than `LONG_LINE_LENGTH` characters is found in it.
+
+    Tk lays a line out as a whole, so a line of megabytes (minified JSON, a
+    single line dump...) makes every redraw slow, and word wrap can hang.
+    From here on, long lines are put in `text_area` as rows of
+    `LONG_LINE_LENGTH` characters (see `LineSegments`), while `document`
+    keeps the real lines: saving writes them as they were read, and the
+    cursor position, search and go to line use their lines and columns.
+    `text_area` is read-only until the file is loaded, edits of the rows are
+    then made in the document by `_edit_long_lines`.
+    """
+    global long_lines, track_edits
+
+    line = document.line_count
+    long_lines = LineSegments(LONG_LINE_LENGTH, line,
+                              document.length - document.line_offset(line))
+
+    # the rows are not the document's lines, don't track them
+    track_edits = False
+    _stop_syntax()
+    text_area.configure(state=DISABLED)
+
+
+def _append_long_lines(text):
+    """Appends `text` to `document`, and its rows to the read-only `text_area`"""
+    first = document.line_count
+    document.insert(document.length, text)
+    _set_text_read_only(
+        lambda: text_area.insert("end - 1 chars", long_lines.append(text)))
+
+    _on_text_edited(first, first, document.line_count)
+
+
+def _unlock_long_lines():
+    """Lets the rows of the long line mode (if active) be edited, see `_edit_long_lines`"""
+    global track_edits
+
+    if not long_lines:
+        return
+
+    track_edits = True
+    text_area.configure(state=NORMAL)
+
+
+def _edit_long_lines(operation, indices, args):
+    """
+    ### Edit Long Lines
+    Makes an edit of `text_area` (a widget command, with the resolved
+    `indices` of rows) in `document`, then puts the new text of the rows it
+    touched back in `text_area`, cut in rows again by `long_lines`. The other
+    rows, even of the same long line, are left alone. Returns the lines that
+    were edited, the way `_on_text_edited` takes them.
+    """
+    call = text_area.tk.call
+    original = f"{text_area}_original"
+
+    def offset(index):
+        line, column = _document_index(index).split(".")
+        return document.offset(int(line), int(column))
+
+    # the rows touched by the edit, whole
+    end_row = int(str(call(original, "index", "end - 1 chars")).split(".")[0])
+    rows = [min(int(index.split(".")[0]), end_row) for index in indices]
+    first_row, last_row = min(rows), max(rows)
+    length = int(str(call(original, "index", f"{last_row}.end")).split(".")[1])
+    start, end = offset(f"{first_row}.0"), offset(f"{last_row}.{length}")
+    first = long_lines.to_line(first_row)[0]
+    last = long_lines.to_line(last_row, length)[0]
+
+    # the marks in these rows, by their offset in the document
+    marks = []
+    for mark in map(str, call(original, "mark", "names")):
+        index = str(call(original, "index", mark))
+        if first_row <= int(index.split(".")[0]) <= last_row:
+            gravity = str(call(original, "mark", "gravity", mark))
+            marks.append((mark, gravity, offset(index)))
+
+    lines_before = document.line_count
+    edits = _mirror_edit(operation, tuple(
+        _document_index(index) for index in indices) + args[len(indices):])
+
+    end += sum(edit_length - (edit_end - edit_start)
+               for edit_start, edit_end, edit_length in edits)
+    call(original, "replace", f"{first_row}.0", f"{last_row}.end",
+         long_lines.replace(first_row, last_row, length,
+                            document.get(start, end)))
+
+    # the marks move with the text, the way tk moves them
+    for mark, gravity, position in marks:
+        for edit_start, edit_end, edit_length in edits:
+            if position > edit_end:
+                position += edit_length - (edit_end - edit_start)
+            elif position >= edit_start:
+                position = edit_start + (edit_length if gravity == RIGHT else 0)
+        call(original, "mark", "set", mark,
+             _display_index("%d.%d" % document.index(position)))
+
+    return first, last, last + document.line_count - lines_before
+
+
+def _copy_long_lines():
+    """
+    Puts the selection in the clipboard the way `document` holds it, without
+    the newlines between the rows of a long line
+    """
+    ranges = _selected_ranges()
+    if not ranges:
+        return
+
+    def offset(index):
+        return document.offset(*map(int, index.split(".")))
+
+    text_area.clipboard_clear()
+    text_area.clipboard_append("".join(
+        document.get(offset(index1), offset(index2)) for index1, index2 in ranges))
+
+
+def _long_lines_message():
+    """Returns the status message of the long line mode"""
+    return f"Lines longer than {LONG_LINE_LENGTH:,} characters are shown in rows"
+
+
+def _stop_long_lines():
+    """
+    ### Stop Long Lines
+    Leaves the long line mode (if active) and clears `text_area`
+    """
+    global long_lines, track_edits
+
+    if not long_lines:
+        return
+
+    long_lines = None
+
+    # back to a normal, empty document
+    text_area.configure(state=NORMAL)
+    text_area.delete("1.0", END)
+    _reset_undo()
+    _reset_document()
+    track_edits = True
+
+
+# ? Follow functions
+def _toggle_follow(event=None):
+    """Starts or stops following the file of the active tab"""
+    if follow:
+        _stop_follow()
+    elif not _start_follow():
+        toggle_follow.set(False)
+
+    return "break"
+
+
+def _start_follow():
+    """
+    ### Start Follow
+    Follows the file of the active tab, like `tail -f`: its last
+    `FOLLOW_TAIL_SIZE` bytes are shown, then what gets appended to it (see
+    `_poll_follow`), keeping at most `FOLLOW_MAX_LINES` lines. The text is
+    read-only meanwhile. Returns `False` if there is no file to follow.
+    """
+    global follow
+
+    path = viewer["path"] if viewer else current_path
+    if not path or not os.path.isfile(path):
+        _set_status_message("Save the document to follow its file")
+        return False
+
+    # the unsaved text is only dropped once it's saved (or the user said no)
+    if not _confirm_close():
+        return False
+
+    # the followed file replaces the text
+    _cancel_paste()
+    _cancel_load(keep_partial=False)
+    _close_viewer()
+    _stop_long_lines()
+    _stop_line_index()
+    _stop_file_watch()
+    text_area.delete("1.0", END)
+    _reset_undo(recording=False)
+    _start_syntax(path)
+
+    follow = {
+        "path": path,
+        "inode": None,  # of the followed file, a new one means it was rotated
+        "offset": 0,  # bytes of the file read so far
+        "skip_line": False,  # whether the first line read is cut
+        "decoder": None,
+        "pending": "",  # text read but not shown yet
+        "job": None,
+    }
+    _rewind_follow(os.stat(path))
+
+    text_area.configure(state=DISABLED)
+    toggle_follow.set(True)
+    _set_status_message(f"Following {_get_filename(path)}")
+
+    follow["job"] = root.after_idle(_poll_follow)
+    return True
+
+
+def _rewind_follow(file_stat):
+    """
+    Starts reading the followed file (of `file_stat`) again from its last
+    `FOLLOW_TAIL_SIZE` bytes, dropping the line they start in the middle of
+    """
+    follow["inode"] = file_stat.st_ino
+    follow["offset"] = max(0, file_stat.st_size - FOLLOW_TAIL_SIZE)
+    follow["skip_line"] = follow["offset"] > 0
+    follow["pending"] = ""
+
+    # utf-8 characters and '\r\n' may be split between two reads
+    follow["decoder"] = io.IncrementalNewlineDecoder(
+        codecs.getincrementaldecoder("utf-8")("replace"), translate=True)
+
+
+def _poll_follow():
+    """
+    ### Poll Follow
+    Reads what was appended to the followed file since the last tick (at most
+    `FOLLOW_READ_SIZE` bytes) and shows it, see `_append_follow`. A file that
+    shrank was truncated and a new file at the same path means the old one
+    was rotated: both are followed again from the start.
+    """
+    follow["job"] = None
+    name = _get_filename(follow["path"])
+
+    try:
+        file_stat = os.stat(follow["path"])
+    except OSError:
+        # rotated away, the new file isn't there yet
+        file_stat = None
+
+    if file_stat and (file_stat.st_ino != follow["inode"] or
+                      file_stat.st_size < follow["offset"]):
+        _set_text_read_only(lambda: text_area.delete("1.0", END))
+        _rewind_follow(file_stat)
+        follow["offset"], follow["skip_line"] = 0, False
+        _set_status_message(f"{name} was truncated or rotated, following it from the start")
+
+    elif file_stat and file_stat.st_size - follow["offset"] > FOLLOW_TAIL_SIZE:
+        # too far behind to catch up, jump to the end
+        _rewind_follow(file_stat)
+        _set_status_message(f"Following {name}, skipped what was written too fast")
+
+    if (file_stat and file_stat.st_size > follow["offset"] and
+            len(follow["pending"]) < FOLLOW_BATCH_SIZE):
+        _read_follow()
+
+    if follow["pending"]:
+        _append_follow()
+
+    follow["job"] = root.after(FOLLOW_INTERVAL, _poll_follow)
+
+
+def _read_follow():
+    """Reads the next (up to) `FOLLOW_READ_SIZE` bytes of the followed file"""
+    try:
+        with open(follow["path"], "rb") as file:
+            file.seek(follow["offset"])
+            data = file.read(FOLLOW_READ_SIZE)
+    except OSError:
+        return
+
+    follow["offset"] += len(data)
+    text = follow["decoder"].decode(data)
+
+    if follow["skip_line"]:
+        newline = text.find("\n")
+        if newline == -1:
+            return
+        text = text[newline + 1:]
+        follow["skip_line"] = False
+
+    follow["pending"] += text
+
+
+def _append_follow():
+    """
+    ### Append Follow
+    Appends (up to) `FOLLOW_BATCH_SIZE` characters of the text read to
+    `text_area` in a single insert, and drops the oldest lines past
+    `FOLLOW_MAX_LINES`. The view stays at the end if it was there.
+    """
+    size = FOLLOW_BATCH_SIZE
+    text, follow["pending"] = follow["pending"][:size], follow["pending"][size:]
+    at_end = text_area.yview()[1] >= 1.0
+
+    def append():
+        text_area.insert(END, text)
+
+        excess = document.line_count - FOLLOW_MAX_LINES
+        if excess > 0:
+            text_area.delete("1.0", f"{excess + 1}.0")
+
+    _set_text_read_only(append)
+    text_area.edit_modified(False)
+
+    if at_end:
+        text_area.see(END)
+
+
+def _set_text_read_only(edit):
+    """Calls `edit`, a function editing the read-only `text_area`"""
+    text_area.configure(state=NORMAL)
+    try:
+        edit()
+    finally:
+        text_area.configure(state=DISABLED)
+
+
+def _stop_follow():
+    """
+    ### Stop Follow
+    Stops following the file. The text shown stays, as a new document: it's
+    only the end of the file, saving it over the file would cut the file.
+    """
+    global follow, current_path
+
+    if not follow:
+        return
+
+    if follow["job"]:
+        root.after_cancel(follow["job"])
+
+    name = _get_filename(follow["path"])
+    follow = None
+
+    text_area.configure(state=NORMAL)
+    _reset_undo()
+    toggle_follow.set(False)
+
+    current_path = ""
+    _set_title_to(f"{name} (end)")
+    _set_status_message()
+
+
+# ? Syntax highlighting functions
+def _start_syntax(path):
+    """
+    ### Start Syntax
+    Highlights the syntax of the active tab by the extension of `path` (see
+    `tokenizer_for`), or stops highlighting it if there is no tokenizer for
+    `path`. A highlighter with the same tokenizer is kept.
+    """
+    global syntax
+
+    # the tokens of long lines wouldn't match their rows
+    tokenizer = None if long_lines else tokenizer_for(path)
+    if syntax and syntax["highlighter"].tokenizer is tokenizer:
+        return
+
+    _stop_syntax()
+    if not tokenizer:
+        return
+
+    syntax = {
+        "highlighter": Highlighter(tokenizer),
+        "tagged": None,  # lines (first, last) tagged so far, see '_highlight_syntax'
+        "job": None,
+    }
+    _schedule_syntax()
+
+
+def _stop_syntax():
+    """Stops highlighting the syntax of the active tab and removes its tags"""
+    global syntax
+
+    if not syntax:
+        return
+
+    if syntax["job"]:
+        root.after_cancel(syntax["job"])
+    syntax = None
+
+    for kind in SYNTAX_COLORS:
+        text_area.tag_remove(f"syntax_{kind}", "1.0", END)
+
+
+def _schedule_syntax():
+    """Highlights the syntax of the view once tk is idle, see `_highlight_syntax`"""
+    if syntax and not syntax["job"]:
+        syntax["job"] = root.after_idle(_highlight_syntax)
+
+
+def _yscroll_command(bar):
+    """Returns the `yscrollcommand` of a text widget scrolled by `bar`"""
+    return lambda first, last: _on_yscroll(bar, first, last)
+
+
+def _on_yscroll(bar, first, last):
+    """Moves the scroll `bar` and highlights the lines scrolled into view"""
+    bar.set(first, last)
+    if bar is scrollbar:
+        _schedule_syntax()
+
+
+def _highlight_syntax():
+    """
+    ### Highlight Syntax
+    Tags the syntax of the lines in view, and `SYNTAX_MARGIN` lines around.
+
+    The lines up to there are lexed first (see `Highlighter`), at most
+    `SYNTAX_TIME_SLICE` seconds per tick, so a jump to the end of a long
+    document doesn't freeze the editor. While scrolling only the lines that
+    weren't tagged yet are, until `SYNTAX_MAX_TAGGED` lines are: then the
+    tags start over around the view. An edit tags the view again.
+    """
+    syntax["job"] = None
+
+    top = int(text_area.index("@0,0").split(".")[0])
+    bottom = int(text_area.index(
+        f"@0,{text_area.winfo_height()}").split(".")[0])
+    first = max(1, top - SYNTAX_MARGIN)
+    last = min(document.line_count, bottom + SYNTAX_MARGIN)
+
+    deadline = time.perf_counter() + SYNTAX_TIME_SLICE
+    if not syntax["highlighter"].advance(_syntax_lines, last, deadline):
+        syntax["job"] = root.after(1, _highlight_syntax)
+        return
+
+    tagged = syntax["tagged"]
+    if (tagged and first <= tagged[1] + 1 and last >= tagged[0] - 1 and
+            max(last, tagged[1]) - min(first, tagged[0]) < SYNTAX_MAX_TAGGED):
+        # only the lines scrolled into view
+        if first < tagged[0]:
+            _tag_syntax(first, tagged[0] - 1)
+        if last > tagged[1]:
+            _tag_syntax(tagged[1] + 1, last)
+        syntax["tagged"] = (min(first, tagged[0]), max(last, tagged[1]))
+    else:
+        for kind in SYNTAX_COLORS:
+            text_area.tag_remove(f"syntax_{kind}", "1.0", END)
+        _tag_syntax(first, last)
+        syntax["tagged"] = (first, last)
+
+
+def _syntax_lines(first, last):
+    """Returns the lines `first` to `last` (1-based) of `document`"""
+    return document.get_lines(first, last).split("\n")
+
+
+def _tag_syntax(first, last):
+    """Tags the tokens of lines `first` to `last`, one batch of ranges per kind"""
+    for kind in SYNTAX_COLORS:
+        text_area.tag_remove(f"syntax_{kind}", f"{first}.0", f"{last + 1}.0")
+
+    ranges = {kind: [] for kind in SYNTAX_COLORS}
+    lines = syntax["highlighter"].tokens(_syntax_lines, first, last)
+    for line, tokens in enumerate(lines, first):
+        for start, end, kind in tokens:
+            ranges[kind].append((f"{line}.{start}", f"{line}.{end}"))
+
+    for kind, kind_ranges in ranges.items():
+        _tag_add_ranges(f"syntax_{kind}", kind_ranges)
+
+
+# ? Context menu Functions
+def _build_context_menu():
+    """
+    ### Build Context Menu
+    Returns the context menu of the text area, built the first time it's shown
+    """
+    menu = Menu(text_area, postcommand=_context_menu_postcommand)
+    menu.add_command(label="Undo", accelerator="Ctrl+Z", command=_undo)
+    menu.add_command(label="Redo", accelerator="Ctrl+Y", command=_redo)
+    menu.add_separator()
+    menu.add_command(label="Cut", accelerator="Ctrl+X", command=_cut)
+    menu.add_command(label="Copy", accelerator="Ctrl+C", command=_copy)
+    menu.add_command(label="Paste", accelerator="Ctrl+V", command=_paste)
+    menu.add_command(label="Delete Selection",
+                     accelerator="Del", command=_delete_selection)
+    menu.add_command(
+        label="Delete All", accelerator="Ctrl+Shift+Del", command=_delete_all)
+    menu.add_separator()
+    menu.add_command(
+        label="Select All", accelerator="Ctrl+A", command=_select_all)
+
+    return menu
+
+
+def _show_context_menu(event):
+    """
+    ### Show Context Menu
+    Displays context menu in the text area
+    """
+    global context_menu
+
+    if context_menu is None:
+        context_menu = _build_context_menu()
+
+    context_menu.tk_popup(event.x_root, event.y_root)
+
+
+# ? Menu Functions
+def _new(event=None):
+    """
+    ### New file
+    Open a new file in the editor
+    """
+    global current_path
+
+    # stop a paste that is still being inserted
+    _cancel_paste()
+    _stop_follow()
+
+    # leave the large file mode
+    _close_viewer()
+
+    if modified:
+        # file is modified, ask to save first
+        answer = _ask_to_save(program_title)
+
+        if answer == None:
+            # ? user cancelled! (Do nothing)
+            return
+
+        elif answer:
+            # * Save
+            # user agreed! (Save)
+            # a partly loaded file is detached first, it's saved elsewhere
+            _cancel_load()
+            if not current_path:
+                # get the filepath
+                current_path = filedialog.asksaveasfilename(
+                    defaultextension=".txt", confirmoverwrite=True,
+                    filetypes=[("Text Documents", "*.txt"), ("All Files", "*.*")])
+
+                if not current_path:
+                    # ? user cancelled the dialog (Do nothing)
+                    return
+
+            # save the content in current_path, the text is kept until it's
+            # written ('_poll_save' reports a failed save)
+            _save_to(current_path)
+            if not _wait_for_save():
+                return
+
+    # * finalizing stuff
+    # stop a file that is still loading
+    _cancel_load(keep_partial=False)
+
+    # leave the long line mode, and clear the text_widget
+    _stop_long_lines()
+    text_area.delete("1.0", END)
+
+    # set modified to false
+    _set_modified(False)
+
+    # reset current_path
+    current_path = ""
+    _stop_line_index()
+    _stop_file_watch()
+    _stop_syntax()
+
+    # reset the title
+    _reset_title()
+
+    # reset Undo actions
+    _reset_undo()
+
+    # update the status bar
+    text_area.event_generate("<<update-statusbar>>")
+
+    # return "break"
+
+
+def _open(event=None):
+    """
+    ### Open a file
+
+    # Bugs:
+    after opening a file, if you edit the file, titles resets back to Untitled!
+    """
+    global current_path
+
+    # open a dialog for file to open
+    path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[
+                                      ("Text Documents", "*.txt"), ("All Files", "*.*")])
+
+    if not path:
+        # ? Cancel (Do nothing)
+        return "break"
+
+    # the file gets a tab of its own, unless this one is still empty
+    if (current_path or modified or document.length or viewer or follow or
+            file_load):
+        _new_tab()
+
+    current_path = path
+
+    if os.path.getsize(current_path) >= LARGE_FILE_THRESHOLD:
+        _open_viewer(current_path)
+    else:
+        _load_file(current_path)
+
+    return "break"
+
+
+def _load_file(path):
+    """
+    ### Load File
+    Loads `path` into `text_area` without blocking the ui.
+
+    A worker thread reads the file in `LOAD_CHUNK_SIZE` pieces, which are
+    inserted at the end of `text_area` by `_poll_file_load` within a time
+    budget per tick. The loaded part can be edited right away, the status bar
+    shows the progress and `Escape` aborts the load.
+    """
+    global file_load
+
+    # stop a paste that is still being inserted, and a load that is still
+    # running
+    _cancel_paste()
+    _cancel_load(keep_partial=False)
+    _stop_file_watch()
+
+    # delete the previous content
+    text_area.delete("1.0", END)
+    text_area.edit_modified(False)
+    _set_modified(False)
+
+    # the chunks are not undoable, undo starts once the file is loaded
+    _reset_undo(recording=False)
+    _start_syntax(path)
+
+    file_load = {
+        "path": path,
+        "size": os.path.getsize(path),
+        "bytes_read": 0,
+        "chunks": queue.Queue(maxsize=LOAD_QUEUE_SIZE),
+        "cancelled": threading.Event(),
+        "job": None,
+    }
+    threading.Thread(target=_read_file_chunks, daemon=True,
+                     args=(path, file_load["chunks"], file_load["cancelled"])).start()
+
+    # set the title to 'path's basename
+    _set_title_to(_get_filename(path))
+    _set_status_message("Loading 0%")
+
+    file_load["job"] = root.after(LOAD_POLL_INTERVAL, _poll_file_load)
+
+
+def _read_file_chunks(path, chunks, cancelled):
+    """
+    ### Read File Chunks
+    Worker thread of `_load_file`, puts `(text, bytes_read)` tuples in `chunks`
+    and finally `None` (or the exception raised while reading).
+
+    `chunks` is bounded, so only a few chunks exist outside of the widget at a
+    time.
+    """
+    def put(item):
+        # wait for room in the queue, unless the load gets cancelled
+        while not cancelled.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
+
+    try:
+        for chunk in read_chunks(path, LOAD_CHUNK_SIZE):
+            if cancelled.is_set():
+                break
+            put(chunk)
+
+    except (OSError, UnicodeDecodeError) as error:
+        put(error)
+    else:
+        put(None)
+
+
+def _poll_file_load():
+    """
+    ### Poll File Load
+    Inserts the chunks read so far into `text_area`, spending at most
+    `LOAD_TIME_BUDGET` seconds per tick so the editor stays responsive.
+    """
+    load = file_load
+    load["job"] = None
+    deadline = time.perf_counter() + LOAD_TIME_BUDGET
+
+    while time.perf_counter() < deadline:
+        try:
+            item = load["chunks"].get_nowait()
+        except queue.Empty:
+            break
+
+        if item is None or isinstance(item, Exception):
+            _finish_load(item)
+            return
+
+        text, load["bytes_read"] = item
 
-    # reset Undo actions
-    text_area.edit_reset()
+        if not long_lines:
+            column = document.length - document.line_offset(document.line_count)
+            if longest_line(text, column) > LONG_LINE_LENGTH:
+                _start_long_lines()
 
-    # update the status bar
+        # the loader's inserts must not mark the file as modified
+        user_modified = text_area.edit_modified()
+        if long_lines:
+            _append_long_lines(text)
+        else:
+            text_area.insert("end - 1 chars", text)
+        text_area.edit_modified(user_modified)
+
+    # report the progress
+    percent = load["bytes_read"] * 100 // max(load["size"], 1)
+    _set_status_message(f"Loading {percent}% (Esc to cancel)")
     text_area.event_generate("<<update-statusbar>>")
 
-    # return "break"
+    load["job"] = root.after(LOAD_POLL_INTERVAL, _poll_file_load)
 
 
-def _open(event=None):
+def _finish_load(error=None):
     """
-    ### Open a file
-
-    # Bugs:
-    after opening a file, if you edit the file, titles resets back to Untitled!
+    ### Finish Load
+    Wraps up a file load started by `_load_file`
     """
-    global current_path
-    global modified
+    global file_load
 
-    if modified:
-        answer = _ask_to_save(program_title)
+    path = file_load["path"]
+    file_load = None
 
-        if answer == None:
-            # ? Cancel (Do nothing)
-            return
+    # undo history starts from the loaded file
+    _reset_undo()
+    _unlock_long_lines()
+    _set_status_message(_long_lines_message() if long_lines else "")
 
-        elif answer:
-            # * Save
-            _save()
+    if error:
+        messagebox.showerror(
+            PROGRAM_NAME, f"Could not open {_get_filename(path)}\n{error}")
+        _cancel_partial_file(path)
+    else:
+        # changes made by other programs are merged from now on, against the
+        # text of the file: unknown if it was edited while loading
+        loaded = not (modified or text_area.edit_modified())
+        _start_file_watch(path, document.snapshot() if loaded else None)
 
-        else:
-            # ! Don't save
-            pass
+    # update the status bar
+    text_area.event_generate("<<update-statusbar>>")
 
-    # open a dialog for file to open
-    current_path = filedialog.askopenfilename(defaultextension=".txt", filetypes=[
-                                              ("Text Documents", "*.txt"), ("All Files", "*.*")])
 
-    if current_path:
-        # delete the previous content
-        text_area.delete("1.0", END)
+def _cancel_load(event=None, keep_partial=True):
+    """
+    ### Cancel Load
+    Aborts the running file load (if any). The part loaded so far stays in
+    `text_area` when `keep_partial` is `True`.
+    """
+    global file_load
 
-        with open(current_path, encoding="utf-8") as file:
-            text_area.insert("1.0", file.read())
+    if not file_load:
+        return
 
-        # set the title to 'current_path's basename
-        _set_title_to(_get_filename(current_path))
+    file_load["cancelled"].set()
+    if file_load["job"]:
+        root.after_cancel(file_load["job"])
 
-        # reset Undo actions
-        text_area.edit_reset()
+    path = file_load["path"]
+    file_load = None
+    _reset_undo()
 
-        # update the status bar
+    if keep_partial:
+        _cancel_partial_file(path)
+        _unlock_long_lines()
+        _set_status_message("Loading cancelled")
         text_area.event_generate("<<update-statusbar>>")
 
     return "break"
 
 
+def _cancel_partial_file(path):
+    """
+    ### Cancel Partial File
+    Detaches a partially loaded buffer from `path`, so saving it can never
+    truncate the file on disk.
+    """
+    global current_path
+
+    current_path = ""
+    _set_title_to(f"*{_get_filename(path)} (partial)")
+    _set_modified(True)
+
+
 def _save(event=None):
     """
     ### Save file
@@ -423,6 +2425,19 @@ def _save(event=None):
     """
     global current_path
 
+    if viewer:
+        _set_status_message("Large files are opened read-only")
+        return "break"
+
+    if follow:
+        _set_status_message("Stop following the file to save it")
+        return "break"
+
+    if file_load:
+        # only part of the file is there, it would replace the whole file
+        _set_status_message("Wait for the file to load (or press Esc) to save it")
+        return "break"
+
     # if current_path not set?
     if not current_path:
         # open a filesave dialog
@@ -431,18 +2446,8 @@ def _save(event=None):
             filetypes=[("Text Documents", "*.txt"), ("All Files", "*.*")])
 
     if current_path:
-        # content to save
-        content = text_area.get("1.0", "end - 1 chars")
-
         # save in current path
-        with open(current_path, "w", encoding="utf-8") as file:
-            file.write(content)
-
-        # set modified to false
-        _set_modified(False)
-
-        # set title to filename
-        _set_title_to(os.path.basename(os.path.normpath(current_path)))
+        _save_to(current_path)
 
     return "break"
 
@@ -454,8 +2459,19 @@ def _save_as(event=None):
     """
 
     global current_path
-    # content to save
-    content = text_area.get("1.0", END)
+
+    if viewer:
+        _set_status_message("Large files are opened read-only")
+        return "break"
+
+    if follow:
+        _set_status_message("Stop following the file to save it")
+        return "break"
+
+    if file_load:
+        # only part of the file is there, it would replace the whole file
+        _set_status_message("Wait for the file to load (or press Esc) to save it")
+        return "break"
 
     # open a filesave dialog
     current_path = filedialog.asksaveasfilename(
@@ -464,15 +2480,140 @@ def _save_as(event=None):
 
     if current_path:
         # save in current path
-        with open(current_path, "w", encoding="utf-8") as file:
-            file.write(content)
-
-        # set title to filename
-        _set_title_to(os.path.basename(os.path.normpath(current_path)))
+        _save_to(current_path)
 
     return "break"
 
 
+def _save_to(path):
+    """
+    ### Save to
+    Saves a snapshot of `document` to `path` in the background (see
+    `_start_save`) and marks the document as saved.
+    """
+    _start_save(path, document.snapshot())
+
+    # set modified to false
+    _set_modified(False)
+
+    # set title to filename
+    _set_title_to(_get_filename(path))
+
+
+def _start_save(path, snapshot):
+    """
+    ### Start Save
+    Writes `snapshot` (a `DocumentSnapshot`) to `path` on a worker thread, see
+    `_save_worker`.
+    Progress and throughput are reported in the status bar by `_poll_save`.
+    """
+    global save_job
+
+    # saves are written in the order they were made
+    _wait_for_save()
+
+    save_job = {
+        "path": path,
+        "snapshot": snapshot,
+        "base": snapshot,  # what the file holds once saved, see '_watch_file'
+        # a replaced file keeps its permissions, new files get the default ones
+        "mode": file_mode(path),
+        "size": 0,  # bytes written
+        "error": None,
+        "start": time.perf_counter(),
+        "end": None,
+        "tab": current_tab,
+    }
+    # not a daemon, python waits for it to finish before exiting
+    save_job["thread"] = threading.Thread(
+        target=_save_worker, args=(save_job,))
+    save_job["thread"].start()
+
+    _set_status_message(f"Saving {_get_filename(path)}...")
+    root.after(SAVE_POLL_INTERVAL, _poll_save, save_job)
+
+
+def _save_worker(job):
+    """
+    ### Save Worker
+    Worker thread of `_start_save`. Writes the snapshot with
+    `write_atomically` (syncing it according to `SAVE_FSYNC`) and records the
+    result in `job`.
+    """
+    snapshot, job["snapshot"] = job["snapshot"], None
+
+    try:
+        job["size"] = write_atomically(
+            job["path"], snapshot.chunks(SAVE_CHUNK_SIZE), job["mode"],
+            SAVE_FSYNC)
+    except (OSError, UnicodeEncodeError) as error:
+        job["error"] = error
+
+    job["end"] = time.perf_counter()
+
+
+def _poll_save(job):
+    """
+    ### Poll Save
+    Waits for the save `job` to finish and reports the result
+    """
+    global save_job
+
+    if job["end"] is None:
+        root.after(SAVE_POLL_INTERVAL, _poll_save, job)
+        return
+
+    if save_job is job:
+        save_job = None
+
+    name = _get_filename(job["path"])
+
+    if job["error"]:
+        _set_status_message(f"Could not save {name}")
+        messagebox.showerror(
+            PROGRAM_NAME, f"Could not save {name}\n{job['error']}")
+
+        # the document still has unsaved changes
+        if job["tab"] is current_tab:
+            _set_modified(True)
+            _set_title_to(f"*{program_title}")
+        elif job["tab"] in tabs:
+            job["tab"]["modified"] = True
+            notebook.tab(job["tab"]["frame"],
+                         text=f"*{job['tab']['program_title']}")
+        return
+
+    elapsed = job["end"] - job["start"]
+    megabytes = job["size"] / (1024 * 1024)
+    _set_status_message(
+        f"Saved {name} ({megabytes:.1f} MB in {elapsed:.2f} s, "
+        f"{megabytes / max(elapsed, 1e-6):.1f} MB/s)")
+
+    # the saved file is watched from now on
+    if job["tab"] is current_tab and job["path"] == current_path:
+        _start_file_watch(current_path, job["base"])
+        _start_syntax(current_path)
+    elif job["tab"] in tabs and job["tab"]["current_path"] == job["path"]:
+        tab = job["tab"]
+        if tab["file_watch"]:
+            tab["file_watch"]["watcher"].stop()
+        tab["file_watch"] = _watch_file(
+            job["path"], None if tab["hibernated"] else job["base"])
+
+
+def _wait_for_save():
+    """
+    ### Wait for Save
+    Blocks until the running save (if any) is written. Returns `False` if it
+    failed.
+    """
+    if not save_job:
+        return True
+
+    save_job["thread"].join()
+    return save_job["error"] is None
+
+
 def _file_properties(event=None):
     """
     ### File Properties
@@ -509,18 +2650,41 @@ def _exit(event=None):
     ### Quit the Application
     Code to execute when users try to close the application
     """
-    # check if file has been modified?
-    if modified:
-        # popup a (file save) dialog
-        answer = _ask_to_save(program_title)
-
-        if answer:
-            # save
-            _save()
-
-        if answer == None:
-            # don't exit!
-            return "break"
+    # the modified tabs ask to be saved, before any tab is closed: cancelling
+    # (or a failed save, each one is waited for) leaves every tab as it was
+    for tab in list(tabs):
+        # (the active tab's state is in the globals)
+        if modified if tab is current_tab else tab["modified"]:
+            _select_tab(tab)
+            if not _confirm_close():
+                # don't exit!
+                return "break"
+
+    # a save still being written must not be cut off
+    if not _wait_for_save():
+        messagebox.showerror(PROGRAM_NAME, "The file could not be saved!")
+        return "break"
+
+    # every tab is closed
+    for tab in list(tabs):
+        if not tab["hibernated"]:
+            _select_tab(tab)
+            _close_document()
+            continue
+
+        # no need to wake a hibernated tab, only these may still run
+        if tab["file_watch"]:
+            tab["file_watch"]["watcher"].stop()
+        if tab["line_index"]:
+            tab["line_index"].cancel()
+
+    # hibernated tabs leave no file behind
+    for tab in tabs:
+        if tab["hibernated"]:
+            try:
+                os.remove(tab["hibernated"])
+            except OSError:
+                pass
 
     # close the application
     root.quit()
@@ -531,7 +2695,11 @@ def _undo(event=None):
     ### Undo 
     Undo your actions
     """
-    text_area.event_generate("<<Undo>>")
+    if paste_job or not undo_history.recording:
+        # the paste (or loaded file) isn't a complete undo step yet
+        return "break"
+
+    _apply_undo_step(undo_history.undo(), undo=True)
     text_area.event_generate("<<update-statusbar>>")
     return "break"
 
@@ -541,34 +2709,189 @@ def _redo(event=None):
     ### Redo
     Redo last actions
     """
-    text_area.event_generate("<<Redo>>")
+    if paste_job or not undo_history.recording:
+        return "break"
+
+    _apply_undo_step(undo_history.redo(), undo=False)
     text_area.event_generate("<<update-statusbar>>")
     return "break"
 
 
+def _apply_undo_step(step, undo):
+    """
+    ### Apply Undo Step
+    Undoes (or redoes) the edits of an `undo_history` step in `text_area`,
+    without recording them, and puts the cursor after the last one.
+    """
+    if not step:
+        return
+
+    def index(offset):
+        return _display_index("%d.%d" % document.index(offset))
+
+    undo_history.recording = False
+    try:
+        for offset, deleted, inserted in (reversed(step) if undo else step):
+            old, new = (inserted, deleted) if undo else (deleted, inserted)
+            text_area.replace(index(offset), index(offset + len(old)), new)
+            cursor = offset + len(new)
+    finally:
+        undo_history.recording = True
+
+    text_area.mark_set(INSERT, index(cursor))
+    text_area.tag_remove("sel", "1.0", END)
+    text_area.see(INSERT)
+
+
 def _cut(event=None):
     """Cut the selection to clipboard"""
     # pyperclip.copy(text_area.selection_get())
-    text_area.event_generate("<<Cut>>")
+    if long_lines:
+        _copy_long_lines()
+        _edit_ranges(_selected_ranges())
+    else:
+        text_area.event_generate("<<Cut>>")
     text_area.event_generate("<<update-statusbar>>")
     return "break"
 
 
 def _copy(event=None):
     """copy the selection to clipboard"""
-    text_area.event_generate("<<Copy>>")
+    if long_lines:
+        _copy_long_lines()
+    else:
+        text_area.event_generate("<<Copy>>")
     text_area.event_generate("<<update-statusbar>>")
     return "break"
 
 
 def _paste(event=None):
-    """Paste the last copied item from clipboard into text widget"""
+    """
+    ### Paste
+    Paste the last copied item from clipboard into text widget.
+
+    Clipboards of `PASTE_CHUNKED_SIZE` characters or more are inserted in
+    chunks by `_start_paste`, so the editor doesn't freeze.
+    """
+    if paste_job:
+        return "break"
+
+    try:
+        text = text_area.clipboard_get()
+    except TclError:
+        # nothing (or no text) to paste
+        return "break"
+
+    if len(text) >= PASTE_CHUNKED_SIZE and not viewer:
+        if file_load:
+            # the text is read-only during the paste, the chunks of the file
+            # would be lost (see '_text_proxy')
+            _set_status_message("Wait for the file to load (or press Esc) to paste it")
+            return "break"
+
+        _start_paste(text)
+        return "break"
+
+    # replacing the selection is a single undo step
+    _begin_undo_group()
     text_area.event_generate("<<Paste>>")
+    _end_undo_group()
     text_area.see("insert")
     text_area.event_generate("<<update-statusbar>>")
     return "break"
 
 
+def _start_paste(text):
+    """
+    ### Start Paste
+    Replaces the selection with `text`, `PASTE_CHUNK_SIZE` characters at a
+    time, see `_poll_paste`.
+
+    The whole paste is one undo step: `_text_proxy` refuses other edits
+    until it is done, so none can slip into it.
+    """
+    global paste_job
+
+    _begin_undo_group()
+
+    if _something_is_selected():
+        text_area.delete(SEL_FIRST, SEL_LAST)
+
+    text_area.mark_set("paste_point", INSERT)
+    text_area.mark_gravity("paste_point", RIGHT)
+
+    paste_job = {
+        "text": text,
+        "position": 0,  # characters inserted so far
+        "inserting": False,  # only the paste's own inserts may edit
+        "start": time.perf_counter(),
+        "job": root.after_idle(_poll_paste),
+    }
+
+
+def _poll_paste():
+    """
+    ### Poll Paste
+    Inserts the next chunks of the paste, spending at most `LOAD_TIME_BUDGET`
+    seconds per tick. Stats are updated from each chunk by `_text_proxy`.
+    """
+    paste = paste_job
+    text, deadline = paste["text"], time.perf_counter() + LOAD_TIME_BUDGET
+
+    paste["inserting"] = True
+    while paste["position"] < len(text) and time.perf_counter() < deadline:
+        chunk = text[paste["position"]:paste["position"] + PASTE_CHUNK_SIZE]
+        text_area.insert("paste_point", chunk)
+        paste["position"] += len(chunk)
+    paste["inserting"] = False
+
+    if paste["position"] >= len(text):
+        _finish_paste()
+        return
+
+    percent = paste["position"] * 100 // len(text)
+    _set_status_message(f"Pasting {percent}% (Esc to cancel)")
+    text_area.see("paste_point")
+    text_area.event_generate("<<update-statusbar>>")
+
+    paste["job"] = root.after(LOAD_POLL_INTERVAL, _poll_paste)
+
+
+def _finish_paste():
+    """
+    ### Finish Paste
+    Wraps up the paste started by `_start_paste`, the cursor goes after the
+    pasted text
+    """
+    global paste_job
+
+    paste, paste_job = paste_job, None
+    _end_undo_group()
+
+    text_area.mark_set(INSERT, "paste_point")
+    text_area.mark_unset("paste_point")
+    text_area.see(INSERT)
+
+    elapsed = time.perf_counter() - paste["start"]
+    _set_status_message(
+        f"Pasted {paste['position']:,} characters ({elapsed:.2f} s)")
+    text_area.event_generate("<<update-statusbar>>")
+
+
+def _cancel_paste(event=None):
+    """
+    ### Cancel Paste
+    Stops the running paste (if any), the part pasted so far stays
+    """
+    if not paste_job:
+        return
+
+    root.after_cancel(paste_job["job"])
+    _finish_paste()
+
+    return "break"
+
+
 def _delete_selection(event=None):
     """
     ### Delete Selection
@@ -580,9 +2903,12 @@ def _delete_selection(event=None):
     3. This will delete all selected words/characters
 
     """
-    # go through each 'indices-pair' and delete them
-    for indices in _get_tag_words("sel", text_area, "1.0", END):
-        text_area.delete(indices[0], indices[1])
+    if viewer:
+        _set_status_message("Large files are opened read-only")
+        return "break"
+
+    # delete every 'indices-pair' at once
+    _edit_ranges(_selected_ranges())
 
     text_area.see("insert")
 
@@ -628,7 +2954,7 @@ def _find_replace_dialog(event=None):
     Displays a `Find and replace` dialog.
     """
     find_win = Toplevel(root)
-    find_win.geometry("370x120+100+150")
+    find_win.geometry("420x145+100+150")
     find_win.title("Find & Replace...")
     find_win.focus()
     find_win.resizable(False, False)
@@ -638,10 +2964,16 @@ def _find_replace_dialog(event=None):
     # remove previously added SEL tag (removes prev. selections)
     text_area.tag_remove("sel", '1.0', END)
 
+    # state of the search running while the user types
+    live_search = {"generation": 0, "job": None, "count": 0}
+
     # Closes the find dialog
     def _cancel_find():
-        # Remove any tags
-        ...
+        # stop a running live search
+        if live_search["job"]:
+            root.after_cancel(live_search["job"])
+        live_search["generation"] += 1
+
         # destroy the find dialog
         find_win.destroy()
 
@@ -656,32 +2988,117 @@ def _find_replace_dialog(event=None):
 
         # get the required variables
         match_case = not match_case_var.get()
-        whole_word = whole_word_var.get()
         search_string = find_entry.get()
-        matches_found = 0
 
         # find the 'search_string' in 'text_widget'
         if search_string:
-            start_pos = '1.0'
-            while True:
-                # 'search' returns the index of the first character found
-                start_pos = text_area.search(
-                    search_string, start_pos, END, nocase=match_case,
-                    exact=whole_word)
+            started = time.perf_counter()
+
+            # search the document's text and tag all matches at once. The
+            # large file viewer only has the window of lines it shows
+            text = text_area.get("1.0", "end-1c") if viewer else document.text()
+            matches = find_all(text, search_string, nocase=match_case,
+                                regex=regex_var.get(),
+                                whole_word=whole_word_var.get())
+            try:
+                matches_found = _tag_add_ranges(
+                    "sel", _display_ranges(offsets_to_indices(text, matches)))
+            except re.error as error:
+                _set_status_message(f"Invalid regular expression: {error}")
+                return
+
+            elapsed = (time.perf_counter() - started) * 1000
+            if viewer:
+                first = viewer["first"] + 1
+                last = viewer["first"] + viewer["count"]
+                _set_status_message(
+                    f"{matches_found} matches found in lines {first:,}-{last:,} "
+                    f"({elapsed:.0f} ms)")
+            else:
+                _set_status_message(
+                    f"{matches_found} matches found ({elapsed:.0f} ms)")
 
-                if not start_pos:
-                    break
+            # focus on text widget
+            text_area.focus_set()
 
-                end_pos = f'{start_pos} + {len(search_string)} chars'
+    # searches while the user types
+    def _live_find(*args):
+        """
+        ### Live Find
+        Searches as `find_entry` changes. Matches in the view are selected
+        first, the rest of the text in `FIND_TIME_SLICE` chunks while the match
+        counter runs, from a snapshot of `document` searched a block of lines
+        at a time (see `find_indices`), or the window of lines of the large
+        file viewer. Every change cancels the search still
+        running.
+        """
+        # a new search generation, the previous one stops
+        live_search["generation"] += 1
+        if live_search["job"]:
+            root.after_cancel(live_search["job"])
+            live_search["job"] = None
 
-                # add 'sel' tag to found indices
-                text_area.tag_add("sel", start_pos, end_pos)
-                matches_found += 1
-                # set the start_pos for next iter. to current end_pos
-                start_pos = end_pos
+        text_area.tag_remove("sel", "1.0", END)
+        match_count_label.configure(text="")
 
-            # focus on text widget
-            text_area.focus_set()
+        search_string = find_var.get()
+        if not search_string:
+            return
+
+        options = {"nocase": not match_case_var.get(),
+                   "regex": regex_var.get(),
+                   "whole_word": whole_word_var.get()}
+
+        try:
+            # the view first
+            top = text_area.index("@0,0 linestart")
+            bottom = text_area.index(f"@0,{text_area.winfo_height()} lineend")
+            visible = text_area.get(top, bottom)
+            _tag_add_ranges("sel", offsets_to_indices(
+                visible, find_all(visible, search_string, **options),
+                first_line=int(top.split(".")[0])))
+        except re.error:
+            match_count_label.configure(text="Invalid regular expression")
+            return
+
+        # then the whole text, a time slice at a time. The large file viewer
+        # only has the window of lines it shows (as in '_find_text')
+        if viewer:
+            window = text_area.get("1.0", "end-1c")
+            ranges = offsets_to_indices(
+                window, find_all(window, search_string, **options))
+        else:
+            ranges = _display_ranges(
+                find_indices(document.snapshot(), search_string, **options))
+        live_search["count"] = 0
+        _live_find_step(live_search["generation"], ranges)
+
+    def _live_find_step(generation, ranges):
+        """Selects the next matches of a live search, for one time slice"""
+        live_search["job"] = None
+
+        if generation != live_search["generation"]:
+            return
+
+        deadline = time.perf_counter() + FIND_TIME_SLICE
+        while time.perf_counter() < deadline:
+            found = _tag_add_ranges("sel", islice(ranges, FIND_BATCH_SIZE))
+            live_search["count"] += found
+
+            if found < FIND_BATCH_SIZE:
+                # the whole text is searched
+                text = f"{live_search['count']} matches"
+                if viewer:
+                    first = viewer["first"] + 1
+                    last = viewer["first"] + viewer["count"]
+                    text += f" in lines {first:,}-{last:,}"
+                match_count_label.configure(text=text)
+                return
+
+        match_count_label.configure(
+            text=f"Searching... {live_search['count']} matches")
+        live_search["job"] = root.after(
+            1, _live_find_step, generation, ranges)
 
     # replaces the text
     def _replace_text():
@@ -689,14 +3106,38 @@ def _find_replace_dialog(event=None):
         ### Replace text
         Replaces the tagged text with the given `word` or `string`.
         """
+        if viewer:
+            _set_status_message("Large files are opened read-only")
+            return
+
         # get the 'replace_with' string
         replace_string = replace_var.get()
-        # print(replace_string)
+        started = time.perf_counter()
+
+        # replace every word in sel tag, all at once!
+        ranges = _selected_ranges()
+        if regex_var.get():
+            # a bad pattern or template is refused before anything is edited
+            try:
+                replace_string = expand_matches(search_pattern(
+                    find_entry.get(), nocase=not match_case_var.get(),
+                    regex=True, whole_word=whole_word_var.get()),
+                    replace_string)
+            except re.error as error:
+                _set_status_message(f"Invalid regular expression: {error}")
+                return
+
+        replaced = _edit_ranges(ranges, replace_string)
+
+        elapsed = (time.perf_counter() - started) * 1000
+        _set_status_message(f"{replaced} replaced ({elapsed:.0f} ms)")
+        text_area.event_generate("<<update-statusbar>>")
 
-        # go through each word in sel tag and replace it!
-        for t in _get_tag_words("sel", text_area, '1.0', END):
-            if t:
-                text_area.replace(t[0], t[1], replace_string)
+    # the dialog's handlers are timed too, with '--diagnostics'
+    _find_text = _instrument("_find_text", _find_text)
+    _live_find = _instrument("_live_find", _live_find)
+    _live_find_step = _instrument("_live_find_step", _live_find_step)
+    _replace_text = _instrument("_replace_text", _replace_text)
 
     find_win.protocol("WM_DELETE_WINDOW", _cancel_find)
 
@@ -742,9 +3183,24 @@ def _find_replace_dialog(event=None):
     whole_word_check = ttk.Checkbutton(options_frame, text="Whole Word",
                                        variable=whole_word_var,
                                        onvalue=True, offvalue=False)
-    # whole_word_check.grid(row=0, column=1, sticky=W)
+    whole_word_check.grid(row=0, column=1, sticky=W)
     # whole_word_check.invoke()
 
+    # Regex_checkbutton
+    regex_var = BooleanVar(value=False)
+    regex_check = ttk.Checkbutton(options_frame, text="Regex",
+                                  variable=regex_var,
+                                  onvalue=True, offvalue=False)
+    regex_check.grid(row=0, column=2, sticky=W)
+
+    # Matches counter
+    match_count_label = ttk.Label(fields_frame, text="")
+    match_count_label.grid(row=4, column=0, columnspan=2, sticky=W)
+
+    # search while typing, and again when an option changes
+    for variable in (find_var, match_case_var, whole_word_var, regex_var):
+        variable.trace_add("write", _live_find)
+
     # * 'Buttons' frame
     buttons_frame = ttk.Frame(find_mainframe)
     buttons_frame.grid(row=0, column=1, sticky=(S, N, E))
@@ -788,10 +3244,7 @@ def _time_date(event=None):
     Insert 'Time & Date' at the cursor
 
     """
-    t = time.localtime(time.time())
-    dt = datetime.datetime(t.tm_year, t.tm_mon, t.tm_mday,
-                           t.tm_hour, t.tm_min, t.tm_sec)
-    time_date_var = f"{dt.strftime('%I:%M %p - %d %B %Y')}"
+    time_date_var = time.strftime('%I:%M %p - %d %B %Y')
     text_area.insert("insert", time_date_var)
 
     text_area.see(INSERT)
@@ -818,8 +3271,8 @@ def _select_all_occurrences(event=None):
     selected_text = _get_selection()[-1]
 
     # search all the matching strings and assign 'sel' to them
-    for indices in _search_all_matching_strings(selected_text, text_area):
-        text_area.tag_add('sel', indices[0], indices[1])
+    _tag_add_ranges(
+        "sel", _search_all_matching_strings(selected_text, text_area))
 
     return "break"
 
@@ -840,7 +3293,7 @@ def _select_current_line(event=None):
 
 def _word_wrap(event=None):
     """Enables or disables the wrap of 'text_view'"""
-    if text_area['wrap'] == WORD or text_area['wrap'] == CHAR:
+    if not toggle_word_wrap.get():
         # disable wrap
         text_area['wrap'] = NONE
         # show horizontal scrollbar
@@ -855,28 +3308,56 @@ def _word_wrap(event=None):
     return "break"
 
 
-def _highlight_active_line(interval=100):
+def _schedule_highlight():
+    """
+    ### Schedule Highlight
+    Moves the active line highlight once tk is idle, merging the requests of
+    all events until then.
+    """
+    global highlight_job
+
+    if highlight_job is None:
+        highlight_job = root.after_idle(_highlight_active_line)
+
+
+def _highlight_active_line():
     """
     ### Highlight active line
     Highlight currently active line
+
+    Only the previously highlighted line (followed by the `active_line_start`
+    mark) and the cursor's line are touched.
     """
-    text_area.tag_remove("active_line", 1.0, END)
+    global highlight_job
+    highlight_job = None
+
+    _undo_highlight()
     text_area.tag_add("active_line", "insert linestart",
                       "insert lineend + 1 chars")
-    text_area.after(interval, _toggle_highlight)
+    text_area.mark_set("active_line_start", "insert linestart")
+    text_area.mark_gravity("active_line_start", LEFT)
 
 
 def _undo_highlight():
-    text_area.tag_remove("active_line", 1.0, END)
+    """Removes the highlight from the previously highlighted line"""
+    if "active_line_start" in text_area.mark_names():
+        text_area.tag_remove("active_line", "active_line_start linestart",
+                             "active_line_start lineend + 1 chars")
+        text_area.mark_unset("active_line_start")
 
 
 def _toggle_highlight(event=None):
     """This function toggles highlight option"""
+    global highlight_job
+
     if toggle_highlight_active_line.get():
         # toggle on
         _highlight_active_line()
     else:
-        # toggle off
+        # toggle off, nothing may be left scheduled
+        if highlight_job is not None:
+            root.after_cancel(highlight_job)
+            highlight_job = None
         _undo_highlight()
 
 
@@ -886,6 +3367,8 @@ def _show_status_bar(event=None):
     """
     if toggle_status_bar.get():
         status_bar.grid(row=1, column=0, sticky=(W, E, S, N))
+        # updates were skipped while it was hidden
+        _schedule_statusbar_update()
 
     else:
         status_bar.grid_forget()
@@ -972,6 +3455,15 @@ def _about(event=None):
         _show_text_window(parent=about_win, data=PROGRAM_LICENSE,
                           title=f"License - {PROGRAM_NAME}")
 
+    def copy_url(event=None):
+        """
+        ### Copy Url
+        Copies the source code's link to the clipboard
+        """
+        # only imported when needed, it slows the startup down
+        import pyperclip
+        pyperclip.copy(PROGRAM_SOURCE_CODE)
+
     # Adding elements
     about_mainframe = ttk.Frame(about_win)
     about_mainframe.grid(row=0, column=0, sticky=(N, E, W, S))
@@ -1003,8 +3495,8 @@ def _about(event=None):
               font=("Calibri", 13), wraplength=550).grid(row=3, column=0, columnspan=2, sticky=W)
     ttk.Label(desc_frame, text=f"{PROGRAM_SOURCE_CODE}", font=("Calibri bold", 13),
               wraplength=550).grid(row=4, column=0, columnspan=2, sticky=W)
-    ttk.Button(desc_frame, text="Copy Url...", command=lambda e=None: pyperclip.copy(
-        PROGRAM_SOURCE_CODE)).grid(row=4, column=1, sticky=W, padx=15)
+    ttk.Button(desc_frame, text="Copy Url...", command=copy_url).grid(
+        row=4, column=1, sticky=W, padx=15)
 
     ttk.Button(desc_frame, text="License", command=show_license_window).grid(
         row=5, column=0, sticky=W, pady=10)
@@ -1018,8 +3510,289 @@ def _about(event=None):
     return "break"
 
 
+# ? Diagnostics functions
+def _start_diagnostics():
+    """
+    ### Start Diagnostics
+    Turns on the latency recording of `--diagnostics`: every handler named in
+    `INSTRUMENTED_HANDLERS` is replaced by its `_instrument`ed version (so it
+    must run before they get bound) and the event loop is watched for stalls.
+    """
+    global diagnostics
+
+    diagnostics = {
+        "start": time.perf_counter(),
+        "handlers": {},  # name -> calls and the latest latencies
+        "stalls": deque(maxlen=DIAGNOSTICS_STALLS),
+        "slowest": None,  # (seconds, name) of the slowest call since the last tick
+    }
+
+    for name in INSTRUMENTED_HANDLERS:
+        globals()[name] = _instrument(name, globals()[name])
+
+    root.after(DIAGNOSTICS_TICK, _watch_event_loop,
+               time.perf_counter() + DIAGNOSTICS_TICK / 1000)
+
+
+def _instrument(name, handler):
+    """
+    ### Instrument
+    Returns `handler` wrapped to record the latency of each call under `name`,
+    in a rolling window of the last `DIAGNOSTICS_SAMPLES` calls. Returns
+    `handler` itself when diagnostics are off.
+    """
+    if diagnostics is None:
+        return handler
+
+    stats = diagnostics["handlers"].setdefault(
+        name, {"calls": 0, "latencies": deque(maxlen=DIAGNOSTICS_SAMPLES)})
+
+    def instrumented(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return handler(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["calls"] += 1
+            stats["latencies"].append(elapsed)
+
+            if not diagnostics["slowest"] or elapsed > diagnostics["slowest"][0]:
+                diagnostics["slowest"] = (elapsed, name)
+
+    return instrumented
+
+
+def _watch_event_loop(expected):
+    """
+    ### Watch Event Loop
+    Ticks every `DIAGNOSTICS_TICK` ms. A tick running `STALL_THRESHOLD` ms (or
+    more) late means the event loop was blocked, that stall is recorded with
+    the slowest handler that ran meanwhile.
+    """
+    now = time.perf_counter()
+    late = (now - expected) * 1000
+
+    if late >= STALL_THRESHOLD:
+        slowest = diagnostics["slowest"]
+        diagnostics["stalls"].append({
+            "at_s": round(now - diagnostics["start"], 3),
+            "duration_ms": round(late, 1),
+            "handler": slowest[1] if slowest else None,
+            "handler_ms": round(slowest[0] * 1000, 1) if slowest else None,
+        })
+
+    diagnostics["slowest"] = None
+    root.after(DIAGNOSTICS_TICK, _watch_event_loop,
+               time.perf_counter() + DIAGNOSTICS_TICK / 1000)
+
+
+def _percentile(values, percent):
+    """Returns the `percent` percentile (nearest rank) of sorted `values`"""
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+
+def _diagnostics_report():
+    """
+    ### Diagnostics Report
+    Returns the recorded latencies (p50/p95/p99 and max per handler, in ms)
+    and stalls, as a JSON-ready dict.
+    """
+    if diagnostics is None:
+        return {"enabled": False}
+
+    handlers = {}
+    for name, stats in diagnostics["handlers"].items():
+        if not stats["calls"]:
+            continue
+
+        latencies = sorted(stats["latencies"])
+        handlers[name] = {
+            "calls": stats["calls"],
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+
+    return {
+        "enabled": True,
+        "uptime_s": round(time.perf_counter() - diagnostics["start"], 1),
+        "samples": DIAGNOSTICS_SAMPLES,
+        "stall_threshold_ms": STALL_THRESHOLD,
+        "handlers": handlers,
+        "stalls": list(diagnostics["stalls"]),
+    }
+
+
+def _reset_diagnostics():
+    """Forgets every latency and stall recorded so far"""
+    for stats in diagnostics["handlers"].values():
+        stats["calls"] = 0
+        stats["latencies"].clear()
+
+    diagnostics["stalls"].clear()
+    diagnostics["start"] = time.perf_counter()
+
+
+def _dump_diagnostics(path):
+    """Writes `_diagnostics_report` to `path` as JSON"""
+    # only imported when needed, it slows the startup down
+    import json
+
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(_diagnostics_report(), file, indent=2)
+
+
+def _diagnostics_window(event=None):
+    """
+    ### Diagnostics Window
+    Shows the latency of each instrumented handler and the event loop stalls,
+    refreshed every `DIAGNOSTICS_REFRESH` ms while open.
+    """
+    diag_win = Toplevel(root)
+    diag_win.title(f"Diagnostics - {PROGRAM_NAME}")
+    diag_win.geometry("640x480+200+120")
+    diag_win.transient(root)
+    diag_win.configure(padx=10, pady=10)
+    diag_win.focus()
+
+    diag_mainframe = ttk.Frame(diag_win)
+    diag_mainframe.grid(row=0, column=0, sticky=NSEW)
+
+    # responsiveness
+    diag_win.columnconfigure(0, weight=1)
+    diag_win.rowconfigure(0, weight=1)
+    diag_mainframe.columnconfigure(0, weight=1)
+
+    if diagnostics is None:
+        ttk.Label(diag_mainframe, font=("Segoe UI", 11), wraplength=600,
+                  text=f"Latency recording is off, start {PROGRAM_NAME} with "
+                  "--diagnostics to turn it on.").grid(row=0, column=0, sticky=W)
+        return "break"
+
+    # * Handlers table
+    columns = ("calls", "p50", "p95", "p99", "max")
+    handlers_table = ttk.Treeview(diag_mainframe, columns=columns, height=12)
+    handlers_table.heading("#0", text="Handler")
+    handlers_table.column("#0", width=200)
+    for column in columns:
+        handlers_table.heading(
+            column, text=column if column == "calls" else f"{column} (ms)")
+        handlers_table.column(column, width=80, anchor=E)
+    handlers_table.grid(row=0, column=0, sticky=NSEW)
+
+    # * Stalls table
+    stalls_label = ttk.Label(diag_mainframe)
+    stalls_label.grid(row=1, column=0, sticky=W, pady=(10, 2))
+
+    stall_columns = ("duration", "handler")
+    stalls_table = ttk.Treeview(diag_mainframe, columns=stall_columns, height=6)
+    stalls_table.heading("#0", text="At (s)")
+    stalls_table.column("#0", width=100)
+    stalls_table.heading("duration", text="Stalled (ms)")
+    stalls_table.column("duration", width=100, anchor=E)
+    stalls_table.heading("handler", text="Slowest handler meanwhile")
+    stalls_table.grid(row=2, column=0, sticky=NSEW)
+
+    diag_mainframe.rowconfigure(0, weight=2)
+    diag_mainframe.rowconfigure(2, weight=1)
+
+    def refresh(event=None):
+        """
+        ### Refresh
+        Shows the latest report, and schedules the next refresh
+        """
+        if not diag_win.winfo_exists():
+            return
+
+        report = _diagnostics_report()
+
+        handlers_table.delete(*handlers_table.get_children())
+        slowest_first = sorted(report["handlers"].items(),
+                               key=lambda item: item[1]["p99_ms"], reverse=True)
+        for name, stats in slowest_first:
+            handlers_table.insert("", END, text=name, values=(
+                stats["calls"], stats["p50_ms"], stats["p95_ms"],
+                stats["p99_ms"], stats["max_ms"]))
+
+        stalls_table.delete(*stalls_table.get_children())
+        for stall in reversed(report["stalls"]):
+            handler = stall["handler"] or ""
+            if handler:
+                handler += f" ({stall['handler_ms']} ms)"
+            stalls_table.insert("", END, text=stall["at_s"], values=(
+                stall["duration_ms"], handler))
+
+        stalls_label.configure(
+            text=f"Event loop stalls of {STALL_THRESHOLD} ms or more: "
+            f"{len(report['stalls'])}")
+
+        root.after(DIAGNOSTICS_REFRESH, refresh)
+
+    def reset(event=None):
+        _reset_diagnostics()
+        refresh()
+
+    def save_json(event=None):
+        """
+        ### Save JSON
+        Asks for a file and dumps the report to it
+        """
+        path = filedialog.asksaveasfilename(
+            parent=diag_win, defaultextension=".json",
+            initialfile="textify-diagnostics.json",
+            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")])
+        if not path:
+            return
+
+        try:
+            _dump_diagnostics(path)
+        except OSError as error:
+            messagebox.showerror(PROGRAM_NAME, f"Could not save {path}\n{error}",
+                                 parent=diag_win)
+
+    # * Buttons
+    buttons_frame = ttk.Frame(diag_mainframe)
+    buttons_frame.grid(row=3, column=0, sticky=E, pady=(10, 0))
+    ttk.Button(buttons_frame, text="Reset", command=reset).grid(
+        row=0, column=0, padx=4)
+    ttk.Button(buttons_frame, text="Save JSON...", command=save_json).grid(
+        row=0, column=1, padx=4)
+    ttk.Button(buttons_frame, text="Close", command=diag_win.destroy).grid(
+        row=0, column=2, padx=4)
+
+    refresh()
+
+    return "break"
+
+
 # ? Program functions
-...
+def _startup_phase(name):
+    """
+    ### Startup Phase
+    Marks the end of the startup phase `name` (timed by `--profile-startup`)
+    """
+    startup_phases.append((name, time.perf_counter()))
+
+
+def _startup_finished():
+    """
+    ### Startup Finished
+    Called once tk is idle after startup, i.e. ready for the first keystroke.
+    With `--profile-startup`, prints how long each phase of the startup took.
+    """
+    _startup_phase("first draw")
+
+    if not PROFILE_STARTUP:
+        return
+
+    print(f"{PROGRAM_NAME} startup (ms):")
+    for (_, start), (name, end) in zip(startup_phases, startup_phases[1:]):
+        print(f"  {name:<24}{(end - start) * 1000:>9.1f}")
+
+    total = startup_phases[-1][1] - startup_phases[0][1]
+    print(f"  {'time to first keystroke':<24}{total * 1000:>9.1f}")
 
 
 # ? CODE FOR THE UI
@@ -1050,16 +3823,107 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+STATS_IDLE_DELAY = 300  # ms of idle time before characters/words are updated
+LOAD_CHUNK_SIZE = 256 * 1024  # characters read at once by the file loader
+LOAD_QUEUE_SIZE = 8  # chunks the file loader may read ahead of the widget
+LOAD_POLL_INTERVAL = 10  # ms between two batches of loaded chunks
+LOAD_TIME_BUDGET = 0.04  # seconds spent inserting chunks per batch
+LARGE_FILE_THRESHOLD = 256 * 1024 * 1024  # bytes, larger files open read-only
+VIEWER_WINDOW_LINES = 2000  # lines of a large file kept in 'text_area'
+VIEWER_MARGIN = 500  # lines left before the window of a large file moves
+VIEWER_INDEX_POLL_INTERVAL = 50  # ms between two checks of the line index
+SAVE_CHUNK_SIZE = 1024 * 1024  # characters written at once by a save
+SAVE_FSYNC = "file"  # "never", "file" (sync the file) or "full" (and its directory)
+SAVE_POLL_INTERVAL = 50  # ms between two checks of a running save
+TAG_BATCH_SIZE = 10000  # ranges tagged per tcl call
+EDIT_BULK_RANGES = 100  # ranges above which a multi-range edit rewrites the lines
+FIND_TIME_SLICE = 0.02  # seconds a live search may run before yielding to tk
+FIND_BATCH_SIZE = 500  # matches tagged between two checks of the time slice
+PROFILE_STARTUP = "--profile-startup" in sys.argv[1:]  # print startup timings
+DIAGNOSTICS = "--diagnostics" in sys.argv[1:]  # record handler latencies
+DIAGNOSTICS_SAMPLES = 1000  # latest calls of each handler the percentiles are taken from
+DIAGNOSTICS_STALLS = 100  # latest event loop stalls kept
+DIAGNOSTICS_TICK = 50  # ms between two checks of the event loop
+DIAGNOSTICS_REFRESH = 1000  # ms between two refreshes of the diagnostics window
+STALL_THRESHOLD = 200  # ms late a check must be to count as a stall
+PASTE_CHUNKED_SIZE = 1024 * 1024  # characters from which a paste is inserted in chunks
+PASTE_CHUNK_SIZE = 64 * 1024  # characters inserted at once by a chunked paste
+TAB_MEMORY_BUDGET = 64 * 1024 * 1024  # characters inactive tabs keep in memory before hibernating
+TAB_COMPRESS_LEVEL = 1  # zlib level of hibernated tabs (fast, logs still shrink a lot)
+UNDO_MEMORY_BUDGET = 32 * 1024 * 1024  # bytes (about) the undo history of each tab may take
+WATCH_POLL_INTERVAL = 1000  # ms between two checks of a file, without inotify
+WATCH_CHECK_INTERVAL = 250  # ms between two checks for changes of the watched file
+FOLLOW_INTERVAL = 100  # ms between two reads of a followed file
+FOLLOW_READ_SIZE = 1024 * 1024  # bytes read at most per read of a followed file
+FOLLOW_BATCH_SIZE = 256 * 1024  # characters appended at most per read of a followed file
+FOLLOW_MAX_LINES = 100000  # lines of a followed file kept, the oldest are dropped
+FOLLOW_TAIL_SIZE = 4 * 1024 * 1024  # bytes shown when following starts (or falls behind)
+LONG_LINE_LENGTH = 10000  # characters, longer lines are shown in rows of this length
+SYNTAX_MARGIN = 50  # lines above and below the view that are highlighted too
+SYNTAX_TIME_SLICE = 0.02  # seconds spent lexing per tick before yielding to tk
+SYNTAX_MAX_TAGGED = 2000  # lines kept tagged while scrolling, then the tags start over
+SYNTAX_COLORS = {
+    "key": "#0451a5", "section": "#af00db", "string": "#a31515",
+    "number": "#098658", "keyword": "#0000ff", "comment": "#008000",
+    "date": "#795e26", "warning": "#b86e00", "error": "#cd3131",
+}  # foreground of each kind of token, see 'tokenizer_for'
+TAB_VARIABLES = (
+    "text_area", "scrollbar", "scrollbar_horizon", "context_menu",
+    "current_path", "modified", "program_title", "document", "line_stats",
+    "undo_history", "line_index", "file_watch", "viewer", "long_lines",
+    "follow", "syntax", "file_load", "paste_job", "track_edits",
+)  # globals every tab has its own value of, see '_new_tab'
+INSTRUMENTED_HANDLERS = (
+    "_new", "_open", "_save", "_save_as", "_file_properties", "_exit",
+    "_undo", "_redo", "_cut", "_copy", "_paste", "_delete_selection",
+    "_delete_current_line", "_delete_all", "_find_replace_dialog",
+    "_go_to_line", "_time_date", "_select_all", "_select_all_occurrences",
+    "_select_current_line", "_word_wrap", "_toggle_highlight",
+    "_show_status_bar", "_fullscreen", "_prefs", "_about", "_modified",
+    "_on_key_release", "_on_text_edited", "_show_context_menu",
+    "_cancel_load", "_cancel_paste", "_poll_file_load", "_poll_paste",
+    "_poll_save", "_flush_cursor_update", "_flush_stats_update",
+    "_highlight_active_line", "_viewer_yview", "_viewer_yscroll",
+    "_poll_viewer_index", "_new_tab", "_close_tab", "_next_tab",
+    "_previous_tab", "_on_tab_changed", "_poll_file_watch", "_toggle_follow",
+    "_poll_follow", "_highlight_syntax",
+)  # handlers timed by '--diagnostics'
 program_title = "Untitled"
 current_path = ""
 modified = False
 is_fullscreen = False  # Keeps track of fullscreen or not
+save_job = None  # The save being written, see '_start_save'
+line_index = None  # Line starts of the file at 'current_path', see '_start_line_index'
+file_watch = None  # Changes of the file at 'current_path' by other programs, see '_watch_file'
+viewer = None  # State of the large file mode, see '_open_viewer'
+long_lines = None  # Rows of the long lines of 'document', see '_start_long_lines'
+follow = None  # State of the followed file, see '_start_follow'
+syntax = None  # Syntax highlighting of the active tab, see '_start_syntax'
+file_load = None  # State of the file being loaded by '_load_file'
+paste_job = None  # State of the large paste being inserted, see '_start_paste'
+highlight_job = None  # Pending 'after_idle' id of the active line highlight
+cursor_update_job = None  # Pending 'after_idle' id of the cursor info update
+stats_update_job = None  # Pending 'after' id of the characters/words update
+track_edits = True  # Mirror edits made in 'text_area' in 'document'
+document = Document()  # The text of 'text_area', see 'Document'
+line_stats = LineStats()  # Number of words in each line of 'text_area'
+undo_history = UndoHistory(UNDO_MEMORY_BUDGET)  # Edits of 'text_area', see '_mirror_edit'
+context_menu = None  # Right click menu of 'text_area', see '_show_context_menu'
+diagnostics = None  # Handler latencies and event loop stalls, see '_start_diagnostics'
+tabs = []  # Every open tab, see '_new_tab'
+current_tab = None  # The active tab, its state is in the globals
+text_area = None  # The text widget of the active tab
+scrollbar = None  # Vertical scrollbar of 'text_area'
+scrollbar_horizon = None  # Horizontal scrollbar of 'text_area'
 unmod_keys = {'Escape', 'Caps_Lock', 'Shift_L', 'Control_L', 'Win_L', 'Alt_L', 'Win_R', 'App', 'Control_R', 'Right',
               'Down', 'Left', 'Up', 'Num_Lock', 'Prior', 'Next', 'Home', 'End', 'Insert', 'F1', 'F2', 'F3', 'F4', 'F6', 'F7', 'F8', 'F9', 'F10'}
+_startup_phase("definitions")
 
 
 # * main root window
 root = Tk()
+if DIAGNOSTICS:
+    _start_diagnostics()  # before any handler gets bound
 root.geometry("1100x750+20+20")
 root.minsize(350, 250)
 root.title(f"{program_title} - {PROGRAM_NAME}")
@@ -1067,9 +3931,10 @@ root.option_add("*tearOff", FALSE) # disable menu tearoffs
 root.protocol("WM_DELETE_WINDOW", _exit)
 root.state("zoomed")  # app will open maximized by default
 
-# setting Logo
-PROGRAM_LOGO = ImageTk.PhotoImage(Image.open("assets\logo.ico"))
+# setting Logo (tk reads png natively, no need for PIL)
+PROGRAM_LOGO = PhotoImage(file="assets/logo.png")
 root.iconphoto(True, PROGRAM_LOGO)
+_startup_phase("root window")
 
 # * creating the menu
 menubar = Menu(root)
@@ -1082,6 +3947,7 @@ menu_file = Menu(menubar)
 menu_file.config(postcommand=_menu_postcommand)
 menubar.add_cascade(menu=menu_file, label="File")
 menu_file.add_command(label="New", command=_new, accelerator="Ctrl+N")
+menu_file.add_command(label="New Tab", command=_new_tab, accelerator="Ctrl+T")
 menu_file.add_command(label="Open...", command=_open, accelerator="Ctrl+O")
 menu_file.add_command(label="Save", command=_save, accelerator="Ctrl+S")
 menu_file.add_command(label="Save As...", command=_save_as,
@@ -1090,6 +3956,7 @@ menu_file.add_separator()
 menu_file.add_command(label="File Properties",
                       command=_file_properties, accelerator="Ctrl+Shift+F")
 menu_file.add_separator()
+menu_file.add_command(label="Close Tab", command=_close_tab, accelerator="Ctrl+W")
 menu_file.add_command(label="Exit", command=_exit, accelerator="Ctrl+Q")
 
 # Edit Menu
@@ -1111,6 +3978,8 @@ menu_edit.add_command(label="Delete All",
 menu_edit.add_separator()
 menu_edit.add_command(label="Find & Replace",
                       command=_find_replace_dialog, accelerator="Ctrl+F")
+menu_edit.add_command(label="Go to Line...",
+                      command=_go_to_line, accelerator="Ctrl+G")
 menu_edit.add_separator()
 menu_edit.add_command(label="Time/Date", command=_time_date, accelerator="F5")
 
@@ -1135,7 +4004,7 @@ menu_view.add_checkbutton(indicatoron=True, onvalue=True, offvalue=False,
                           label="Word Wrap", variable=toggle_word_wrap, command=_word_wrap)
 
 toggle_highlight_active_line = BooleanVar(value=False)
-menu_view.add_checkbutton(label="Highlight Active Line", command=_highlight_active_line,
+menu_view.add_checkbutton(label="Highlight Active Line", command=_toggle_highlight,
                           variable=toggle_highlight_active_line, onvalue=True, offvalue=False)
 toggle_status_bar = BooleanVar(value=True)
 menu_view.add_checkbutton(label="Status Bar", command=_show_status_bar, indicatoron=True,
@@ -1146,6 +4015,11 @@ menu_view.add_checkbutton(label="Full Screen", command=_fullscreen, accelerator=
                           indicatoron=False, onvalue=True, offvalue=False,
                           variable=toggle_fullscreen)
 
+menu_view.add_separator()
+toggle_follow = BooleanVar(value=False)
+menu_view.add_checkbutton(label="Follow", command=_toggle_follow,
+                          variable=toggle_follow, onvalue=True, offvalue=False)
+
 
 # Tools Menu
 menu_tools = Menu(menubar)
@@ -1165,6 +4039,8 @@ menu_tools.add_command(label="Preferences",
 menu_help = Menu(menubar)
 menubar.add_cascade(menu=menu_help, label="Help")
 menu_help.add_command(label="About", command=_about, accelerator="F1")
+menu_help.add_command(label="Diagnostics", command=_diagnostics_window)
+_startup_phase("menus")
 
 
 # * Mainframe
@@ -1172,46 +4048,10 @@ mainframe = ttk.Frame(root)
 mainframe.grid(row=0, column=0, sticky=(N, W, E, S))
 
 
-# * Text_area
-text_area = Text(mainframe, wrap="word", undo=1)
-text_area.grid(row=0, column=0, sticky=(W, E, S, N))
-text_area.configure(background="#eeeeee", relief="flat", padx=8, pady=4)
-# text's styling
-text_area.configure(font=("Segoe UI", 20),)
-# cursor's styling
-text_area.configure(insertbackground="#505050", insertwidth=1)
-text_area.focus()
-text_area.tag_config("active_line", background="#dddddd")
-
-
-# * context menu
-context_menu = Menu(text_area, postcommand=_context_menu_postcommand)
-context_menu.add_command(label="Undo", accelerator="Ctrl+Z", command=_undo)
-context_menu.add_command(label="Redo", accelerator="Ctrl+Y", command=_redo)
-context_menu.add_separator()
-context_menu.add_command(label="Cut", accelerator="Ctrl+X", command=_cut)
-context_menu.add_command(label="Copy", accelerator="Ctrl+C", command=_copy)
-context_menu.add_command(label="Paste", accelerator="Ctrl+V", command=_paste)
-context_menu.add_command(label="Delete Selection",
-                         accelerator="Del", command=_delete_selection)
-context_menu.add_command(
-    label="Delete All", accelerator="Ctrl+Shift+Del", command=_delete_all)
-context_menu.add_separator()
-context_menu.add_command(
-    label="Select All", accelerator="Ctrl+A", command=_select_all)
-
-
-# * scroll bar  -> Vertical
-scrollbar = ttk.Scrollbar(
-    mainframe, orient="vertical", command=text_area.yview)
-scrollbar.grid(row=0, column=1, sticky=(N, E, S))
-text_area.config(yscrollcommand=scrollbar.set)
-
-# * scroll bar  -> Horizontal
-scrollbar_horizon = ttk.Scrollbar(
-    mainframe, orient="horizontal", command=text_area.xview)
-scrollbar_horizon.grid(row=1, column=0, sticky=(S, E, W))
-text_area.config(xscrollcommand=scrollbar_horizon.set)
+# * Tabs (each one has its own text area, see '_new_tab')
+notebook = ttk.Notebook(mainframe)
+notebook.grid(row=0, column=0, sticky=(W, E, S, N))
+notebook.bind("<<NotebookTabChanged>>", _on_tab_changed)
 
 
 # * Status bar
@@ -1219,9 +4059,14 @@ status_bar = ttk.Frame(root)
 status_bar.grid(row=1, column=0, sticky=(W, E, S, N))
 status_bar.config(borderwidth=1, relief="solid")
 
+# Message Label (progress and results of long commands)
+status_message_label = ttk.Label(status_bar, text="")
+status_message_label.grid(row=0, column=0, padx=5, sticky=W)
+status_message_label.config(anchor="w", font=("Segoe UI", 10))
+
 # Inner Frame
 s_b_inner_frame = ttk.Frame(status_bar)
-s_b_inner_frame.grid(row=0, column=0, ipadx=5, sticky=E)
+s_b_inner_frame.grid(row=0, column=1, ipadx=5, sticky=E)
 
 # Cursor Info Label
 cursor_info_label = ttk.Label(s_b_inner_frame, text="Line: 1 | Column: 1")
@@ -1236,6 +4081,14 @@ chars_words_label = ttk.Label(s_b_inner_frame, text="Characters: 0 | Words: 0")
 chars_words_label.grid(row=0, column=2)
 chars_words_label.config(anchor="w", font=("Segoe UI", 10))
 
+ttk.Separator(s_b_inner_frame, orient="vertical").grid(
+    row=0, column=3, padx=20)
+
+# Undo history memory Label
+undo_info_label = ttk.Label(s_b_inner_frame, text="Undo: 0 B")
+undo_info_label.grid(row=0, column=4)
+undo_info_label.config(anchor="w", font=("Segoe UI", 10))
+
 
 # * Spacing and Padding >> Responsiveness
 # root.config(padx=5, pady=3)
@@ -1247,74 +4100,15 @@ mainframe.rowconfigure(0, weight=1)
 status_bar.columnconfigure(0, weight=1)
 
 
-# * tag styling
-# Selection tag config
-text_area.tag_configure("sel", background="#15a1ff", foreground="white")
+# * the first tab
+_new_tab()
+_startup_phase("widgets")
 
 
 # * KeyBindings
-text_area.bind("<Key>", _modified)
-text_area.bind("<<Modified>>", _modified)
 root.event_add("<<update-statusbar>>", "<KeyRelease>", "<ButtonRelease>")
-text_area.bind("<<update-statusbar>>", _on_key_release)
-
-# context menu
-text_area.bind("<App>", _show_context_menu)  # for keyboard
-text_area.bind("<Button-3>", _show_context_menu)  # for mouse
-
-# file menu
 root.bind("<Control-q>",  _exit)
 root.bind("<Control-Q>",  _exit)
-text_area.bind("<Control-n>", _new)
-text_area.bind("<Control-N>", _new)
-text_area.bind("<Control-o>", _open)
-text_area.bind("<Control-O>", _open)
-text_area.bind("<Control-s>", _save)
-text_area.bind("<Control-S>", _save)
-text_area.bind("<Control-Shift-s>", _save_as)
-text_area.bind("<Control-Shift-S>", _save_as)
-text_area.bind("<Control-Shift-f>", _file_properties)
-text_area.bind("<Control-Shift-F>", _file_properties)
-
-# edit menu
-text_area.bind("<Control-z>", _undo)
-text_area.bind("<Control-Z>", _undo)
-text_area.bind("<Control-Y>", _redo)
-text_area.bind("<Control-y>", _redo)
-text_area.bind("<Control-X>", _cut)
-text_area.bind("<Control-x>", _cut)
-text_area.bind("<Control-c>", _copy)
-text_area.bind("<Control-C>", _copy)
-text_area.bind("<Control-v>", _paste)
-text_area.bind("<Control-V>", _paste)
-text_area.bind("<Delete>", _delete_selection)
-text_area.bind("<Control-Shift-k>", _delete_current_line)
-text_area.bind("<Control-Shift-K>", _delete_current_line)
-text_area.bind("<Control-Shift-Delete>", _delete_all)
-text_area.bind("<Control-F>", _find_replace_dialog)
-text_area.bind("<Control-f>", _find_replace_dialog)
-text_area.bind("<KeyPress-F5>", _time_date)
-
-# selection menu
-text_area.bind("<Control-a>", _select_all)
-text_area.bind("<Control-Shift-l>", _select_all_occurrences)
-text_area.bind("<Control-Shift-L>", _select_all_occurrences)
-text_area.bind("<Control-l>", _select_current_line)
-text_area.bind("<Control-L>", _select_current_line)
-
-# view menu
-# text_area.bind("<Alt-z>", _word_wrap)
-# text_area.bind("<Alt-Z>", _word_wrap)
-# text_area.bind("<Alt-h>", _highlight_active_line)
-# text_area.bind("<Alt-H>", _highlight_active_line)
-text_area.bind("<KeyPress-F11>", _fullscreen)
-
-# tools menu
-text_area.bind("<Control-Shift-p>", _prefs)
-text_area.bind("<Control-Shift-P>", _prefs)
-
-# help menu
-text_area.bind("<KeyPress-F1>", _about)
 
 
 # ? DEBUG MODE :: REMOVE AFTERWARDS
@@ -1327,7 +4121,7 @@ def DEBUG():
     _set_title_to(_get_filename(current_path))
 
     # reset Undo actions
-    text_area.edit_reset()
+    _reset_undo()
 
     # update the status bar
     text_area.event_generate("<<update-statusbar>>")
@@ -1335,4 +4129,6 @@ def DEBUG():
 
 # DEBUG()
 
+_startup_phase("key bindings")
+root.after_idle(_startup_finished)
 root.mainloop()
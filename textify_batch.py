@@ -0,0 +1,164 @@
+"""
+### Textify Batch
+Finds and replaces text in many files without opening a window, the way
+the Find & Replace dialog does (match case by default, whole word and
+regex, with `\\1` group references in the replacement). Files are spread
+over a pool of processes, rewritten atomically, and the number of matches
+of each one is printed.
+
+    python textify.py --batch colour color notes.txt "docs/**/*.md"
+    python textify_batch.py --regex --ignore-case "(\\w+)@old\\.org" "\\1@new.org" "*.csv" --dry-run
+
+Files are read a block of lines at a time, so a match can't span two
+blocks (see `textify_core.replace_in_file`). Their line endings are kept.
+"""
+import os
+import re
+import sys
+import glob
+import time
+import argparse
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from textify_core import expand_matches, replace_in_file, search_pattern
+
+
+# * Batch variables
+FILES_PER_TASK = 16  # files sent to a worker process at once
+FSYNC = "file"  # "never", "file" (sync each file) or "full" (and its directory)
+
+
+# ? Batch functions
+def expand_paths(patterns):
+    """
+    ### Expand Paths
+    Returns the files of `patterns` (paths or globs, `**` matching any
+    directories), each once, and the patterns that matched none.
+    """
+    paths = {}
+    missing = []
+
+    for pattern in patterns:
+        if any(char in pattern for char in "*?["):
+            found = [path for path in sorted(glob.glob(pattern, recursive=True))
+                     if os.path.isfile(path)]
+        else:
+            found = [pattern] if os.path.isfile(pattern) else []
+
+        if not found:
+            missing.append(pattern)
+        paths.update(dict.fromkeys(found))
+
+    return list(paths), missing
+
+
+def _replace_file(path, options):
+    """
+    Worker of the pool: replaces the matches in the file at `path` (see
+    `replace_in_file`). Returns the path, the number of matches, the size of
+    the file and the error that stopped it (or `None`).
+    """
+    try:
+        count, size = replace_in_file(path, **options)
+    except (OSError, UnicodeError, re.error) as error:
+        return path, 0, 0, error
+
+    return path, count, size, None
+
+
+# ? Program functions
+def main(argv=None):
+    """
+    ### Main
+    Replaces the matches in every file asked for, printing the matches of
+    each file as it's done and the total throughput at the end. Returns the
+    exit status: `1` if a file couldn't be replaced in.
+    """
+    parser = argparse.ArgumentParser(
+        description="Find and replace in many files, like Textify's "
+        "Find & Replace dialog")
+    parser.add_argument("--batch", action="store_true",
+                        help=argparse.SUPPRESS)  # 'textify.py --batch'
+    parser.add_argument("string", help="text (or regular expression) to find")
+    parser.add_argument("replacement", help="text replacing every match")
+    parser.add_argument("paths", nargs="+",
+                        help="files, or globs like 'docs/**/*.txt'")
+    parser.add_argument("--ignore-case", action="store_true",
+                        help="don't match case (the dialog matches case)")
+    parser.add_argument("--whole-word", action="store_true",
+                        help="only match whole words")
+    parser.add_argument("--regex", action="store_true",
+                        help="'string' is a regular expression")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="count the matches, don't change the files")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="worker processes (default: one per cpu, "
+                        "1 runs without a pool)")
+    args = parser.parse_args(argv)
+
+    options = {
+        "string": args.string,
+        "replacement": args.replacement,
+        "nocase": args.ignore_case,
+        "regex": args.regex,
+        "whole_word": args.whole_word,
+        "dry_run": args.dry_run,
+        "fsync": FSYNC,
+    }
+
+    if not args.string:
+        parser.error("the string to find is empty")
+    try:
+        pattern = search_pattern(args.string, args.ignore_case, args.regex,
+                                 args.whole_word)
+    except re.error as error:
+        parser.error(f"invalid regular expression: {error}")
+    if args.regex:
+        try:
+            expand_matches(pattern, args.replacement)
+        except re.error as error:
+            parser.error(f"invalid replacement: {error}")
+
+    paths, missing = expand_paths(args.paths)
+    for pattern in missing:
+        print(f"no files match {pattern}", file=sys.stderr)
+
+    start = time.perf_counter()
+    files = matches = changed = size = errors = 0
+
+    if args.jobs == 1:
+        results = map(_replace_file, paths, repeat(options))
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=args.jobs)
+        results = pool.map(_replace_file, paths, repeat(options),
+                           chunksize=FILES_PER_TASK)
+
+    try:
+        for path, count, file_size, error in results:
+            if error:
+                errors += 1
+                print(f"{'error':>10}  {path}: {error}", file=sys.stderr)
+                continue
+
+            print(f"{count:>10,}  {path}")
+            files += 1
+            matches += count
+            changed += bool(count)
+            size += file_size
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    megabytes = size / (1024 * 1024)
+    action = "found" if args.dry_run else "replaced"
+    print(f"{matches:,} matches {action} in {changed:,} of {files:,} files, "
+          f"{megabytes:.1f} MB in {elapsed:.2f} s "
+          f"({megabytes / max(elapsed, 1e-6):.1f} MB/s)")
+
+    return 1 if errors or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
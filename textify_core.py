@@ -0,0 +1,1803 @@
+"""
+### Textify Core
+Everything Textify does to a text that doesn't need a window: the `Document`
+model, word statistics, find & replace, reading and (atomically) writing files,
+the undo history, syntax highlighting, the line index of large files and
+watching files for changes made by other programs.
+
+Only the standard library is used, so the core can be imported (and tested or
+benchmarked) without tkinter, PIL or a display.
+"""
+import os
+import re
+import stat
+import sys
+import time
+import zlib
+import select
+import difflib
+import struct
+import random
+import marshal
+import tempfile
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+
+# * Core variables
+DOCUMENT_BLOCK_SIZE = 16 * 1024  # characters of the block small inserts share
+READ_CHUNK_SIZE = 256 * 1024  # characters read at once from a file
+WRITE_CHUNK_SIZE = 1024 * 1024  # characters written at once to a file
+LINE_INDEX_CHUNK = 8 * 1024 * 1024  # bytes read at once by the line indexer
+LINE_INDEX_SAVE_SIZE = 32 * 1024 * 1024  # bytes, smaller files' indexes aren't saved
+LINE_INDEX_HEADER = "<4sQQQQ"  # magic, mtime (ns), size, number of lines and 'LINE_INDEX_STEP'
+LINE_INDEX_STEP = 64  # lines between two line starts kept by 'LineIndex'
+UNDO_MEMORY_BUDGET = 32 * 1024 * 1024  # bytes (about) the undo history of a document takes
+UNDO_ARCHIVE_STEPS = 256  # oldest undo steps compressed together
+UNDO_COMPRESS_LEVEL = 1  # zlib level of the archived undo steps
+UNDO_EDIT_OVERHEAD = 120  # bytes (about) of an edit, besides its text
+WATCH_SETTLE_TIME = 0.1  # seconds a watched file is left to be written before it's checked
+INOTIFY_MASK = 0x3ce  # modify, attrib, close write, moved from/to, create and delete
+DIFF_BLOCK_SIZE = 64 * 1024  # characters compared at once by 'diff_texts'
+DIFF_MAX_LINES = 100000  # changed lines above which 'diff_texts' compares blocks of lines
+DIFF_BLOCK_LINES = 64  # lines (about) of the blocks compared by 'diff_texts'
+SYNTAX_LEX_BATCH = 1000  # lines read at once by 'Highlighter.advance'
+FIND_BLOCK_LINES = 10000  # lines searched at once by 'find_indices'
+BATCH_BLOCK_SIZE = 4 * 1024 * 1024  # characters (about) searched at once by 'replace_in_file'
+
+
+# * Document model
+class _PieceNode:
+    """
+    Node of the balanced tree (a treap) of the pieces of a document: a piece,
+    the subtrees of the pieces before and after it, and the characters and
+    newlines of the whole subtree. Nodes are never modified, an edit makes new
+    nodes on the path to the root, so snapshots share the rest of the tree.
+    """
+    __slots__ = ("piece", "priority", "left", "right", "piece_lines",
+                 "length", "lines")
+
+    def __init__(self, piece, priority, left=None, right=None, piece_lines=None):
+        buffer, start, end, breaks = piece
+        if piece_lines is None:
+            piece_lines = bisect_right(breaks, end) - bisect_right(breaks, start)
+
+        self.piece = piece
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.piece_lines = piece_lines
+        self.length = end - start
+        self.lines = piece_lines
+
+        if left is not None:
+            self.length += left.length
+            self.lines += left.lines
+        if right is not None:
+            self.length += right.length
+            self.lines += right.lines
+
+    def copy(self, left, right):
+        """Returns this node with the subtrees `left` and `right`"""
+        return _PieceNode(self.piece, self.priority, left, right,
+                          self.piece_lines)
+
+
+def _merge_pieces(left, right):
+    """Returns the tree of the pieces of `left` followed by those of `right`"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+
+    if left.priority > right.priority:
+        return left.copy(left.left, _merge_pieces(left.right, right))
+    return right.copy(_merge_pieces(left, right.left), right.right)
+
+
+def _split_pieces(node, offset):
+    """
+    Returns the trees of the pieces before and after `offset`, cutting the
+    piece holding it in two
+    """
+    if node is None:
+        return None, None
+
+    left_length = node.left.length if node.left is not None else 0
+    if offset <= left_length:
+        left, right = _split_pieces(node.left, offset)
+        return left, node.copy(right, node.right)
+
+    buffer, start, end, breaks = node.piece
+    piece_end = left_length + end - start
+    if offset >= piece_end:
+        left, right = _split_pieces(node.right, offset - piece_end)
+        return node.copy(node.left, left), right
+
+    middle = start + offset - left_length
+    return (_PieceNode((buffer, start, middle, breaks), node.priority, node.left),
+            _PieceNode((buffer, middle, end, breaks), node.priority, None,
+                       node.right))
+
+
+def _piece_slices(node, start, end, offset=0):
+    """Yields the slices of the pieces of `node` between `start` and `end`"""
+    while node is not None:
+        left_length = node.left.length if node.left is not None else 0
+        if start < offset + left_length:
+            yield from _piece_slices(node.left, start, end, offset)
+
+        offset += left_length
+        buffer, piece_start, piece_end, breaks = node.piece
+        if offset >= end:
+            return
+        if start < offset + piece_end - piece_start:
+            yield buffer[piece_start + max(start - offset, 0):
+                         min(piece_start + end - offset, piece_end)]
+
+        offset += piece_end - piece_start
+        node = node.right
+
+
+class _AppendBlock:
+    """
+    Block small inserts are appended to. Characters are only ever added to
+    the end (as utf-32) and the pieces slice the ones they were given, like
+    a string: `block[start:end]`.
+    """
+    __slots__ = ("_data", "length")
+
+    def __init__(self):
+        self._data = bytearray()
+        self.length = 0
+
+    def append(self, text):
+        """Appends `text` to the block"""
+        self._data += text.encode("utf-32-le", "surrogatepass")
+        self.length += len(text)
+
+    def __getitem__(self, key):
+        return self._data[key.start * 4:key.stop * 4].decode(
+            "utf-32-le", "surrogatepass")
+
+
+class DocumentSnapshot:
+    """
+    ### Document Snapshot
+    Immutable view of the text of a `Document`, made by `Document.snapshot`.
+
+    The text is a sequence of pieces `(buffer, start, end, breaks)`: a slice
+    of a `buffer` that is never modified, and `breaks`, the positions in
+    `buffer` right after each of its newlines. The pieces are kept in a
+    balanced tree counting the characters and newlines of each subtree, so
+    offsets and lines are found in `O(log pieces)`.
+    """
+
+    def __init__(self, root=None):
+        self._root = root
+        self._text = None  # the whole text, once joined
+
+    @property
+    def length(self):
+        """Number of characters of the text"""
+        return self._root.length if self._root is not None else 0
+
+    @property
+    def line_count(self):
+        """Number of lines of the text"""
+        return self._root.lines + 1 if self._root is not None else 1
+
+    def text(self):
+        """Returns the whole text, joined once and kept until the next edit"""
+        if self._text is None:
+            self._text = "".join(self.chunks())
+        return self._text
+
+    def chunks(self, size=None):
+        """
+        Returns a generator of the pieces of the text, in order. With `size`,
+        pieces are cut in chunks of at most `size` characters.
+        """
+        node, parents = self._root, []
+        while node is not None or parents:
+            while node is not None:
+                parents.append(node)
+                node = node.left
+
+            node = parents.pop()
+            buffer, start, end, breaks = node.piece
+            step = size or end - start
+            for chunk_start in range(start, end, step):
+                yield buffer[chunk_start:min(chunk_start + step, end)]
+            node = node.right
+
+    def get(self, start, end):
+        """Returns the text between offsets `start` and `end`"""
+        if self._text is not None:
+            return self._text[start:end]
+        return "".join(_piece_slices(self._root, max(start, 0), end))
+
+    def get_lines(self, first, last):
+        """Returns the text of lines `first` to `last` (1-based, inclusive)"""
+        if last < self.line_count:
+            end = self.line_offset(last + 1) - 1
+        else:
+            end = self.length
+        return self.get(self.line_offset(first), end)
+
+    def line_offset(self, line):
+        """Returns the offset where `line` (1-based) starts"""
+        if line <= 1:
+            return 0
+        if line > self.line_count:
+            return self.length
+
+        # the piece holding the newline ending the previous line
+        newline, offset, node = line - 2, 0, self._root
+        while True:
+            left = node.left
+            if left is not None:
+                if newline < left.lines:
+                    node = left
+                    continue
+                newline -= left.lines
+                offset += left.length
+
+            buffer, start, end, breaks = node.piece
+            if newline < node.piece_lines:
+                position = breaks[bisect_right(breaks, start) + newline]
+                return offset + position - start
+
+            newline -= node.piece_lines
+            offset += end - start
+            node = node.right
+
+    def offset_line(self, offset):
+        """Returns the line (1-based) holding `offset`"""
+        offset = max(0, min(offset, self.length))
+        line, node = 1, self._root
+
+        while node is not None:
+            left = node.left
+            if left is not None:
+                if offset < left.length:
+                    node = left
+                    continue
+                offset -= left.length
+                line += left.lines
+
+            buffer, start, end, breaks = node.piece
+            if offset < end - start:
+                return (line + bisect_right(breaks, start + offset) -
+                        bisect_right(breaks, start))
+
+            offset -= end - start
+            line += node.piece_lines
+            node = node.right
+
+        return line
+
+    def offset(self, line, column):
+        """Returns the offset of tk index `line.column`"""
+        if line > self.line_count:
+            return self.length
+        return min(self.line_offset(line) + column, self.length)
+
+    def index(self, offset):
+        """Returns the `(line, column)` of `offset`"""
+        line = self.offset_line(offset)
+        return line, offset - self.line_offset(line)
+
+
+class Document(DocumentSnapshot):
+    """
+    ### Document
+    Piece table holding the text of a file. Textify keeps the one of
+    `text_area` in sync with the widget, stats, searches and saves read it
+    instead of copying the text out of the widget, and `snapshot` gives
+    background workers an immutable view of it.
+
+    Small inserts are appended to a shared block (and typing at the same
+    place keeps growing the same piece), large inserts keep their own string.
+    An edit replaces `O(log pieces)` nodes of the tree, a snapshot shares it.
+    """
+
+    def __init__(self, text=""):
+        super().__init__()
+        self._block = _AppendBlock()  # the block small inserts are appended to
+        self._block_breaks = array("Q")
+
+        if text:
+            self._root = _PieceNode(
+                (text, 0, len(text), line_breaks(text)), random.random())
+
+    def snapshot(self):
+        """Returns an immutable `DocumentSnapshot` of the current text"""
+        snapshot = DocumentSnapshot(self._root)
+        snapshot._text = self._text
+        return snapshot
+
+    def insert(self, offset, text):
+        """Inserts `text` at `offset`"""
+        if not text:
+            return
+
+        offset = max(0, min(offset, self.length))
+        before, after = _split_pieces(self._root, offset)
+        self._text = None
+
+        if len(text) >= DOCUMENT_BLOCK_SIZE:
+            # large inserts are a buffer of their own
+            piece = _PieceNode((text, 0, len(text), line_breaks(text)),
+                               random.random())
+            self._root = _merge_pieces(_merge_pieces(before, piece), after)
+            return
+
+        if self._block.length + len(text) > DOCUMENT_BLOCK_SIZE:
+            self._block, self._block_breaks = _AppendBlock(), array("Q")
+
+        start = self._block.length
+        self._block.append(text)
+        self._block_breaks.extend(
+            start + position for position in line_breaks(text))
+
+        # typing right after the previous insert grows its piece
+        if before is not None:
+            last = before
+            while last.right is not None:
+                last = last.right
+
+            buffer, previous_start, previous_end, breaks = last.piece
+            if breaks is self._block_breaks and previous_end == start:
+                piece = (buffer, previous_start, self._block.length, breaks)
+                self._root = _merge_pieces(
+                    self._replace_last(before, piece), after)
+                return
+
+        piece = _PieceNode(
+            (self._block, start, self._block.length, self._block_breaks),
+            random.random())
+        self._root = _merge_pieces(_merge_pieces(before, piece), after)
+
+    def _replace_last(self, node, piece):
+        """Returns the tree `node` with its last piece replaced by `piece`"""
+        if node.right is not None:
+            return node.copy(node.left, self._replace_last(node.right, piece))
+        return _PieceNode(piece, node.priority, node.left)
+
+    def delete(self, start, end):
+        """Deletes the text between offsets `start` and `end`"""
+        start, end = max(start, 0), min(end, self.length)
+        if start >= end:
+            return
+
+        before, rest = _split_pieces(self._root, start)
+        deleted, after = _split_pieces(rest, end - start)
+        self._root = _merge_pieces(before, after)
+        self._text = None
+
+
+def line_breaks(text):
+    """Returns an `array('Q')` of the positions right after each newline in `text`"""
+    lengths = map(len, text.split("\n")[:-1])
+    return array("Q", accumulate(map((1).__add__, lengths)))
+
+
+# * Statistics
+class LineStats:
+    """
+    ### Line Stats
+    Number of words on each line of a text, and their total. Edits only
+    recount the lines they touched, see `update`.
+    """
+
+    def __init__(self, text=""):
+        self.reset(text)
+
+    def reset(self, text=""):
+        """Counts the words of every line of `text`"""
+        self.words = [len(line.split()) for line in text.split("\n")]
+        self.total = sum(self.words)
+
+    def update(self, first, last, lines):
+        """
+        Replaces the counts of lines `first` to `last` (1-based, inclusive)
+        with the counts of `lines` (the new text of that span, split on
+        newlines).
+        """
+        new_words = [len(line.split()) for line in lines]
+
+        # swap the old span's total with the new one
+        self.total += sum(new_words) - sum(self.words[first - 1:last])
+        self.words[first - 1:last] = new_words
+
+
+# * Long lines
+def longest_line(text, column=0):
+    """Returns the length of the longest line of `text`, the first starting at `column`"""
+    lengths = [len(line) for line in text.split("\n")]
+    lengths[0] += column
+    return max(lengths)
+
+
+class LineSegments:
+    """
+    ### Line Segments
+    Shows the lines of a text longer than `length` characters as rows of
+    `length` characters (the last one may be shorter), with a newline
+    between two rows. Converts the `(line, column)` of the text to the
+    `(row, column)` of the rows and back.
+
+    Only the long lines are kept, with the row they start at and the columns
+    their other rows start at. Text is appended while it's loaded (see
+    `append`), an edit only cuts the rows it touched again (see `replace`),
+    so the rows of an edited line may be shorter, or up to twice as long.
+    """
+
+    def __init__(self, length, line=1, column=0):
+        self.length = length
+        self.lines = []  # lines (1-based) shown in more than one row
+        self.rows = []  # row (1-based) each of them starts at
+        self.breaks = []  # columns each of their other rows start at
+        self.line = line  # line the appended text ends in
+        self.column = column  # length of that line
+
+    def append(self, text):
+        """Appends `text` to the text and returns it as rows"""
+        pieces = text.split("\n")
+        length = self.length
+
+        for number, piece in enumerate(pieces):
+            line = self.line + number
+            start = self.column if number == 0 else 0
+            end = start + len(piece)
+            if number == len(pieces) - 1:
+                self.line, self.column = line, end
+
+            if end <= length:
+                continue
+
+            # a row starts at every column that is a multiple of 'length'
+            first = -start % length if start else length
+            breaks = range(start + first, end, length)
+            pieces[number] = _cut_rows(piece, start, breaks)
+
+            if self.lines and self.lines[-1] == line:
+                # a line continued by this text
+                self.breaks[-1].extend(breaks)
+            else:
+                self.rows.append(self.to_row(line)[0])
+                self.lines.append(line)
+                self.breaks.append(list(breaks))
+
+        return "\n".join(pieces)
+
+    def replace(self, first_row, last_row, length, text):
+        """
+        ### Replace
+        Replaces rows `first_row` to `last_row` (the last one `length`
+        characters long) with `text`, the new text they show, and returns it
+        as rows. Only the lines of `text` longer than twice `self.length`
+        are cut in rows again, the rows before and after stay as they are.
+        """
+        first, start_column = self.to_line(first_row)
+        last, end_column = self.to_line(last_row, length)
+        pieces = text.split("\n")
+        length = self.length
+
+        low = bisect_left(self.lines, first)
+        high = bisect_right(self.lines, last)
+        old_next_row = self._first_row(last + 1)
+
+        # the rows of the first and last lines outside of the span
+        before = after = []
+        if low < high and self.lines[low] == first:
+            before = self.breaks[low][:first_row - self.rows[low]]
+        if low < high and self.lines[high - 1] == last:
+            shift = len(pieces[-1]) - end_column
+            if len(pieces) == 1:
+                shift += start_column
+            after = [column + shift for column in
+                     self.breaks[high - 1][last_row - self.rows[high - 1]:]]
+
+        lines, rows, breaks = [], [], []
+        row = self._first_row(first)
+
+        for number, piece in enumerate(pieces):
+            line = first + number
+            column = start_column if number == 0 else 0
+            cuts = []
+            if len(piece) > 2 * length:
+                cuts = range(column + length, column + len(piece), length)
+            pieces[number] = _cut_rows(piece, column, cuts)
+
+            row_starts = list(cuts)
+            if number == 0:
+                row_starts[:0] = before
+            if number == len(pieces) - 1:
+                row_starts.extend(after)
+
+            if row_starts:
+                lines.append(line)
+                rows.append(row)
+                breaks.append(row_starts)
+            row += len(row_starts) + 1
+
+        # the long lines after the span move with it
+        line_shift = first + len(pieces) - 1 - last
+        row_shift = row - old_next_row
+        for index in range(high, len(self.lines)):
+            self.lines[index] += line_shift
+            self.rows[index] += row_shift
+
+        self.lines[low:high] = lines
+        self.rows[low:high] = rows
+        self.breaks[low:high] = breaks
+
+        return "\n".join(pieces)
+
+    def to_row(self, line, column=0):
+        """Returns the `(row, column)` of `column` of `line` (1-based)"""
+        index = bisect_right(self.lines, line) - 1
+        if index < 0:
+            return line, column
+
+        if self.lines[index] == line:
+            breaks = self.breaks[index]
+            segment = bisect_right(breaks, column)
+            row_start = breaks[segment - 1] if segment else 0
+            return self.rows[index] + segment, column - row_start
+
+        return line + self._extra_rows(index), column
+
+    def to_line(self, row, column=0):
+        """Returns the `(line, column)` of `column` of `row` (1-based)"""
+        index = bisect_right(self.rows, row) - 1
+        if index < 0:
+            return row, column
+
+        breaks = self.breaks[index]
+        segment = row - self.rows[index]
+        if segment <= len(breaks):
+            row_start = breaks[segment - 1] if segment else 0
+            return self.lines[index], row_start + column
+
+        return row - self._extra_rows(index), column
+
+    def _first_row(self, line):
+        """Returns the row `line` starts at (its first row may be empty)"""
+        index = bisect_left(self.lines, line)
+        if index < len(self.lines) and self.lines[index] == line:
+            return self.rows[index]
+        return self.to_row(line)[0]
+
+    def _extra_rows(self, index):
+        """Returns the rows the long lines up to `index` take besides their first"""
+        return self.rows[index] + len(self.breaks[index]) - self.lines[index]
+
+
+def _cut_rows(piece, start, breaks):
+    """Returns `piece`, a line from column `start`, cut in rows at columns `breaks`"""
+    if not breaks:
+        return piece
+
+    columns = [start, *breaks, start + len(piece)]
+    return "\n".join(piece[column - start:next_column - start]
+                     for column, next_column in zip(columns, columns[1:]))
+
+
+# * Undo history
+class UndoHistory:
+    """
+    ### Undo History
+    The edits made to a document, in undo steps. An edit is a tuple
+    `(offset, deleted, inserted)`: at `offset`, the text `deleted` was
+    replaced with `inserted`. A step is a list of edits undone together.
+
+    Typing and deleting one character at a time is grouped into steps of a
+    word each (see `record`), and `begin_group` / `end_group` group anything
+    else. The history never takes more than about `budget` bytes: the oldest
+    steps are compressed into the archive, and the oldest archives dropped.
+    """
+
+    def __init__(self, budget=UNDO_MEMORY_BUDGET):
+        self.budget = budget
+        self.recording = True  # whether `record` records anything
+        self._undo = []  # steps, oldest first
+        self._redo = []  # undone steps, most recently undone last
+        self._archive = []  # compressed oldest steps, as (data, count)
+        self._sizes = [0, 0, 0]  # estimated bytes of undo, redo and archive
+        self._group = 0  # depth of the open `begin_group`s
+        self._open = False  # whether the last step may still grow
+        self._typing = False  # whether the last step is single characters
+
+    @staticmethod
+    def _cost(edit):
+        """Returns the estimated bytes an edit takes"""
+        return UNDO_EDIT_OVERHEAD + sys.getsizeof(edit[1]) + sys.getsizeof(edit[2])
+
+    @staticmethod
+    def _steps_cost(steps):
+        """Returns the estimated bytes a list of steps takes"""
+        return sum(UndoHistory._cost(edit) for step in steps for edit in step)
+
+    @property
+    def memory(self):
+        """Estimated bytes the history takes"""
+        return sum(self._sizes)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo or self._archive)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        """Forgets every step (the document was replaced)"""
+        self._undo.clear()
+        self._redo.clear()
+        self._archive.clear()
+        self._sizes = [0, 0, 0]
+        self._open = self._typing = False
+
+    def separate(self):
+        """Makes the next edit start a new step"""
+        if not self._group:
+            self._open = self._typing = False
+
+    def begin_group(self):
+        """Records every edit until the matching `end_group` as a single step"""
+        self._group += 1
+        if self._group == 1:
+            self._open = self._typing = False
+
+    def end_group(self):
+        self._group = max(self._group - 1, 0)
+        if not self._group:
+            self._open = self._typing = False
+
+    def _merge(self, last, edit):
+        """
+        ### Merge
+        Returns the single edit doing `last` then `edit`, or `None` if they
+        aren't contiguous. Outside of groups, only single characters merge,
+        and a whitespace typed after a word starts a new step.
+        """
+        offset, deleted, inserted = last
+        new_offset, new_deleted, new_inserted = edit
+        typing = not self._group
+
+        # typing over a deletion (a selection, or a replace)
+        if not new_deleted and not inserted and new_offset == offset:
+            if typing and len(new_inserted) != 1:
+                return None
+            return (offset, deleted, new_inserted)
+
+        # typing after the last inserted text
+        if not new_deleted and new_offset == offset + len(inserted):
+            if typing and (len(new_inserted) != 1 or not self._typing or
+                           new_inserted.isspace() and inserted and
+                           not inserted[-1].isspace()):
+                return None
+            return (offset, deleted, inserted + new_inserted)
+
+        if new_inserted or inserted:
+            return None
+        if typing and (len(new_deleted) != 1 or not self._typing):
+            return None
+
+        # backspace, before the last deletion
+        if new_offset + len(new_deleted) == offset:
+            return (new_offset, new_deleted + deleted, "")
+
+        # delete, at the last deletion
+        if new_offset == offset:
+            return (offset, deleted + new_deleted, "")
+
+        return None
+
+    def record(self, offset, deleted, inserted):
+        """Records that `deleted` was replaced with `inserted` at `offset`"""
+        if not self.recording or not (deleted or inserted):
+            return
+
+        if self._redo:
+            self._redo.clear()
+            self._sizes[1] = 0
+
+        edit = (offset, deleted, inserted)
+        step = self._undo[-1] if self._open else None
+        merged = self._merge(step[-1], edit) if step else None
+
+        if merged is not None:
+            self._sizes[0] += self._cost(merged) - self._cost(step[-1])
+            step[-1] = merged
+            self._typing = self._typing or not self._group
+        elif step is not None and self._group:
+            self._sizes[0] += self._cost(edit)
+            step.append(edit)
+        else:
+            self._sizes[0] += self._cost(edit)
+            self._undo.append([edit])
+            self._typing = len(deleted) + len(inserted) == 1
+            self._open = True
+
+        # outside of groups, only steps of single characters keep growing (and
+        # deletions, a character typed over a selection replaces it)
+        if not self._group and inserted and len(deleted) + len(inserted) != 1:
+            self._open = self._typing = False
+
+        self._trim()
+
+    def _archive_steps(self, count):
+        """Compresses the `count` oldest steps into the archive"""
+        steps = self._undo[:count]
+        del self._undo[:count]
+        data = zlib.compress(marshal.dumps(steps), UNDO_COMPRESS_LEVEL)
+
+        self._sizes[0] -= self._steps_cost(steps)
+        self._sizes[2] += sys.getsizeof(data)
+        self._archive.append((data, count))
+
+    def _trim(self):
+        """Archives and drops the oldest steps while over the budget"""
+        if self.memory <= self.budget:
+            return
+
+        # steps are archived in batches, the open step stays live
+        while self._sizes[0] > self.budget // 2 and len(self._undo) > 1:
+            self._archive_steps(min(UNDO_ARCHIVE_STEPS, len(self._undo) - 1))
+
+        while self._archive and self.memory > self.budget:
+            data, _ = self._archive.pop(0)
+            self._sizes[2] -= sys.getsizeof(data)
+
+    def compress(self):
+        """Archives every step (the document is put away)"""
+        self.separate()
+        if self._undo:
+            self._archive_steps(len(self._undo))
+
+    def _unarchive(self):
+        """Decompresses the newest archive, before the live steps"""
+        data, _ = self._archive.pop()
+        steps = marshal.loads(zlib.decompress(data))
+
+        self._sizes[2] -= sys.getsizeof(data)
+        self._sizes[0] += self._steps_cost(steps)
+        self._undo[:0] = steps
+
+    def undo(self):
+        """
+        ### Undo
+        Moves the newest step to the redo steps and returns it, or `None`.
+        Its edits are undone in reverse, replacing each `inserted` at
+        `offset` with `deleted`.
+        """
+        if self._group:
+            return None
+        if not self._undo and self._archive:
+            self._unarchive()
+        if not self._undo:
+            return None
+
+        step = self._undo.pop()
+        cost = self._steps_cost([step])
+        self._sizes[0] -= cost
+        self._sizes[1] += cost
+        self._redo.append(step)
+        self._open = self._typing = False
+        return step
+
+    def redo(self):
+        """
+        ### Redo
+        Moves the last undone step back to the undo steps and returns it, or
+        `None`. Its edits are redone in order, replacing each `deleted` at
+        `offset` with `inserted`.
+        """
+        if self._group or not self._redo:
+            return None
+
+        step = self._redo.pop()
+        cost = self._steps_cost([step])
+        self._sizes[1] -= cost
+        self._sizes[0] += cost
+        self._undo.append(step)
+        self._open = self._typing = False
+        self._trim()
+        return step
+
+
+# * Syntax highlighting
+_JSON_TOKENS = re.compile(r"""
+    (?P<key>"(?:[^"\\]|\\.)*"(?=\s*:))
+  | (?P<string>"(?:[^"\\]|\\.)*"?)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<keyword>\b(?:true|false|null)\b)
+""", re.VERBOSE)
+
+_YAML_TOKENS = re.compile(r"""
+    (?P<comment>(?:^|(?<=\s))\#.*)
+  | ^[ \t]*(?:-[ \t]+)?(?P<key>[^\s#'"{}\[\],:-][^#:]*?)(?=:(?:\s|$))
+  | (?P<string>"(?:[^"\\]|\\.)*"?|'(?:[^']|'')*'?)
+  | (?P<number>(?<![\w.])[-+]?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?(?![\w.]))
+  | (?P<keyword>(?<![\w-])(?:true|false|yes|no|on|off|null|~)(?![\w-])
+        |^(?:---|\.\.\.)(?=\s|$)|[&*][\w-]+|![\w!/-]*)
+""", re.VERBOSE | re.IGNORECASE)
+_YAML_BLOCK = re.compile(r":\s*[|>][-+0-9]*\s*(?:#.*)?$")
+
+_INI_LINE = re.compile(r"""
+    \s*(?:
+        (?P<comment>[;\#].*)
+      | (?P<section>\[.*\])
+      | (?P<key>[^=:\s][^=:]*?)\s*[=:]\s*(?P<string>.*?)
+    )\s*$
+""", re.VERBOSE)
+
+_LOG_TOKENS = re.compile(r"""
+    (?P<date>\d{4}-\d\d-\d\d[T\s]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?
+        |\b\d\d:\d\d:\d\d(?:[.,]\d+)?\b)
+  | (?P<error>\b(?:ERROR|ERR|FATAL|CRITICAL|EXCEPTION|PANIC)\b)
+  | (?P<warning>\b(?:WARN|WARNING)\b)
+  | (?P<keyword>\b(?:INFO|NOTICE)\b)
+  | (?P<comment>\b(?:DEBUG|TRACE)\b)
+  | (?P<string>"[^"]*")
+""", re.VERBOSE)
+_LOG_CONTINUATION = re.compile(r"\s|Traceback |Caused by|\S+(?:Error|Exception)\b")
+
+
+def tokenize_json(line, state=None):
+    """
+    ### Tokenize JSON
+    Returns the `(start, end, kind)` tokens of a line of JSON and the state
+    the line ends in (always `None`, JSON strings can't span lines).
+    """
+    return [(match.start(), match.end(), match.lastgroup)
+            for match in _JSON_TOKENS.finditer(line)], None
+
+
+def tokenize_yaml(line, state=None):
+    """
+    ### Tokenize YAML
+    Returns the tokens of a line of YAML and the state it ends in: the
+    indentation of the key a block scalar (`key: |`) belongs to, whose more
+    indented lines are a single string, or `None`.
+    """
+    indent = len(line) - len(line.lstrip(" "))
+
+    if state is not None and (indent > state or not line.strip()):
+        return [(indent, len(line), "string")] if line.strip() else [], state
+
+    tokens = [match.span(match.lastgroup) + (match.lastgroup,)
+              for match in _YAML_TOKENS.finditer(line)]
+    return tokens, indent if _YAML_BLOCK.search(line) else None
+
+
+def tokenize_ini(line, state=None):
+    """
+    ### Tokenize INI
+    Returns the tokens of a line of an INI (or .cfg, .conf...) file, and
+    `None` as its state
+    """
+    match = _INI_LINE.match(line)
+    if not match:
+        return [], None
+
+    return [(match.start(kind), match.end(kind), kind)
+            for kind in ("comment", "section", "key", "string")
+            if match.group(kind)], None
+
+
+def tokenize_log(line, state=None):
+    """
+    ### Tokenize Log
+    Returns the tokens of a line of a log file and its state: `"error"`
+    after an error, so the indented lines of a stack trace following it are
+    errors too, or `None`.
+    """
+    if state == "error" and line and _LOG_CONTINUATION.match(line):
+        return [(0, len(line), "error")], state
+
+    tokens = [(match.start(), match.end(), match.lastgroup)
+              for match in _LOG_TOKENS.finditer(line)]
+    error = any(kind == "error" for _, _, kind in tokens)
+    return tokens, "error" if error else None
+
+
+SYNTAX_TOKENIZERS = {
+    ".json": tokenize_json,
+    ".yaml": tokenize_yaml,
+    ".yml": tokenize_yaml,
+    ".ini": tokenize_ini,
+    ".cfg": tokenize_ini,
+    ".conf": tokenize_ini,
+    ".log": tokenize_log,
+}  # tokenizer of each file extension, see 'tokenizer_for'
+
+
+def tokenizer_for(path):
+    """
+    Returns the tokenizer of the file at `path` (by its extension, see
+    `SYNTAX_TOKENIZERS`), or `None`
+    """
+    return SYNTAX_TOKENIZERS.get(os.path.splitext(path)[1].lower())
+
+
+_UNKNOWN = object()  # state of a line that must be lexed again
+
+
+class Highlighter:
+    """
+    ### Highlighter
+    Tokenizes a document line by line with a `tokenizer`, a function taking
+    a line and the state the previous line ended in, and returning the
+    `(start, end, kind)` tokens of the line and the state it ends in.
+
+    Only the end state of every line is kept. After an edit, lines are lexed
+    again from the edited one until a line ends in the same state as before
+    (see `edited` and `advance`), and the tokens of a line are found from
+    the state of the line before it (see `tokens`).
+    """
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.states = []  # the state each line (0-based) ends in
+        self.lexed = 0  # lines from the top whose state is up to date
+        self.stale = 0  # lines up to this one (1-based) must be lexed before lexing ends early
+
+    def start_state(self, line):
+        """Returns the state line `line` (1-based) starts in"""
+        return self.states[line - 2] if line > 1 else None
+
+    def edited(self, first, old_last, new_last):
+        """Lines `first` to `old_last` (1-based) are now lines `first` to `new_last`"""
+        if first > len(self.states):
+            return
+
+        if old_last > len(self.states):
+            del self.states[first - 1:]
+        else:
+            self.states[first - 1:old_last] = [_UNKNOWN] * (new_last - first + 1)
+
+        if self.stale >= old_last:
+            self.stale += new_last - old_last
+        self.stale = max(self.stale, new_last)
+        self.lexed = min(self.lexed, first - 1)
+
+    def advance(self, get_lines, until, deadline=None):
+        """
+        ### Advance
+        Lexes the lines up to `until` (1-based) that aren't up to date,
+        reading them with `get_lines(first, last)`. Stops at `deadline` (a
+        `time.perf_counter()`), returns whether `until` was reached.
+        """
+        line = self.lexed + 1
+        state = self.start_state(line)
+        changed = False  # whether the last line lexed ends in a new state
+
+        while line <= until:
+            last = min(line + SYNTAX_LEX_BATCH - 1, until)
+            for text in get_lines(line, last):
+                state = self.tokenizer(text, state)[1]
+
+                if line > len(self.states):
+                    self.states.append(state)
+                    changed = False
+                elif line > self.stale and self.states[line - 1] == state:
+                    # the lines after this one end in the same states as
+                    # before, lexing goes on after the last known one
+                    line = len(self.states) + 1
+                    state = self.states[-1]
+                    changed = False
+                    break
+                else:
+                    changed = self.states[line - 1] != state
+                    self.states[line - 1] = state
+                line += 1
+
+            self.lexed = line - 1
+            if deadline and time.perf_counter() > deadline:
+                break
+
+        if changed:
+            # the state of the next line followed from the old state of this
+            # one, lexing can't end early before the next line is lexed
+            self.stale = max(self.stale, self.lexed)
+        elif self.lexed > self.stale:
+            self.stale = 0
+
+        return line > until
+
+    def tokens(self, get_lines, first, last):
+        """
+        Returns the tokens of lines `first` to `last` (1-based), one list per
+        line. The lines before must have been lexed, see `advance`.
+        """
+        state = self.start_state(first)
+        lines = []
+        for text in get_lines(first, last):
+            tokens, state = self.tokenizer(text, state)
+            lines.append(tokens)
+        return lines
+
+
+# * Find & Replace
+def find_all(text, string, nocase=False, regex=False, whole_word=False):
+    """
+    ### Find All
+    Returns a generator of the `(start, end)` offsets of every `string` in
+    `text`. With `regex`, `string` is a regular expression, `whole_word` only
+    matches it between word boundaries.
+    """
+    if nocase or regex or whole_word:
+        pattern = search_pattern(string, nocase, regex, whole_word)
+        for match in pattern.finditer(text):
+            # empty matches can't be selected
+            if match.end() > match.start():
+                yield match.span()
+        return
+
+    length = len(string)
+    start = text.find(string)
+    while start != -1:
+        yield start, start + length
+        start = text.find(string, start + length)
+
+
+def find_indices(document, string, nocase=False, regex=False, whole_word=False,
+                 block_lines=FIND_BLOCK_LINES):
+    """
+    ### Find Indices
+    Returns a generator of the `(index1, index2)` tk indices of every
+    `string` in `document` (a `DocumentSnapshot`), with the options of
+    `find_all`. The text is read and searched `block_lines` lines at a time,
+    so a regular expression can't match across two blocks.
+    """
+    # a string of several lines is searched with as many lines more
+    overlap = 0 if regex else string.count("\n")
+    line, skip = 1, 0
+
+    while line <= document.line_count:
+        last = min(line + block_lines - 1, document.line_count)
+        text = document.get_lines(line, last + overlap)
+        end = document.line_offset(last + 1) - document.line_offset(line)
+
+        # the matches starting in the block, after the one ending in it
+        spans = []
+        for start, stop in find_all(text[skip:] if skip else text, string,
+                                    nocase, regex, whole_word):
+            if start + skip >= end:
+                break
+            spans.append((start + skip, stop + skip))
+        skip = max(spans[-1][1] - end, 0) if spans else 0
+
+        yield from offsets_to_indices(text, spans, first_line=line)
+        line = last + 1
+
+
+def search_pattern(string, nocase=False, regex=False, whole_word=False):
+    """
+    ### Search Pattern
+    Returns the compiled pattern searching `string` with the find options.
+    Raises `re.error` if `string` is not a valid regular expression.
+    """
+    pattern = string if regex else re.escape(string)
+
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+
+    # '^' and '$' match at the start and end of every line
+    flags = re.MULTILINE | (re.IGNORECASE if nocase else 0)
+    return compile_pattern(pattern, flags)
+
+
+@lru_cache(maxsize=128)
+def compile_pattern(pattern, flags):
+    """
+    ### Compile Pattern
+    `re.compile` with a bounded LRU cache of its own, so searching the same
+    pattern again (e.g. while typing) skips compiling it.
+    """
+    return re.compile(pattern, flags)
+
+
+def line_starts(text):
+    """Returns a list of the offsets at which each line of `text` starts"""
+    starts = [0]
+    starts.extend(accumulate(len(line) + 1 for line in text.split("\n")[:-1]))
+    return starts
+
+
+def offsets_to_indices(text, spans, first_line=1):
+    """
+    ### Offsets to Indices
+    Converts `(start, end)` offsets in `text` (sorted) to `(index1, index2)`
+    tk indices, counting the newlines between one offset and the next.
+    `first_line` is the line number of the start of `text`.
+    """
+    line, line_start, position = first_line, 0, 0
+
+    def index(offset):
+        nonlocal line, line_start, position
+
+        newlines = text.count("\n", position, offset)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", position, offset) + 1
+        position = offset
+
+        return f"{line}.{offset - line_start}"
+
+    for start, end in spans:
+        yield index(start), index(end)
+
+
+def expand_matches(pattern, template):
+    """
+    ### Expand Matches
+    Returns a replacement function for `replace_spans` that expands the
+    group references (`\\1`, `\\g<name>`) of `template` with the match of the
+    compiled `pattern` in each span.
+    Raises `re.error` if `template` is invalid, before anything is replaced.
+    """
+    # the template is parsed even without a match
+    try:
+        pattern.sub(template, "")
+    except IndexError as error:
+        # an unknown group name
+        raise re.error(str(error)) from None
+
+    def replacement(text, start, end):
+        match = pattern.match(text, start)
+        if match and match.end() == end:
+            return match.expand(template)
+
+        # the span isn't a match (anymore), use the template as it is
+        return template
+
+    return replacement
+
+
+def replace_spans(text, spans, replacement):
+    """
+    ### Replace Spans
+    Returns `text` with every `(start, end)` span (sorted, not overlapping)
+    replaced, in one pass. `replacement` is a string or a function
+    `replacement(text, start, end)` returning the string of each span.
+    """
+    pieces = []
+    position = 0
+    for start, end in spans:
+        pieces.append(text[position:start])
+
+        if callable(replacement):
+            pieces.append(replacement(text, start, end))
+        else:
+            pieces.append(replacement)
+
+        position = end
+    pieces.append(text[position:])
+
+    return "".join(pieces)
+
+
+def replace_all(text, string, replacement, nocase=False, regex=False,
+                whole_word=False):
+    """
+    ### Replace All
+    Replaces every match of `string` in `text` with `replacement` (a template
+    with group references in `regex` mode). Returns the new text and the
+    number of replacements.
+    """
+    spans = list(find_all(text, string, nocase, regex, whole_word))
+
+    if regex:
+        replacement = expand_matches(
+            search_pattern(string, nocase, regex, whole_word), replacement)
+
+    return replace_spans(text, spans, replacement), len(spans)
+
+
+# * Files
+def read_chunks(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    ### Read Chunks
+    Returns a generator of `(text, bytes_read)` tuples reading the utf-8 file
+    at `path` `chunk_size` characters at a time.
+    Raises `OSError` or `UnicodeDecodeError`.
+    """
+    with open(path, encoding="utf-8") as file:
+        while True:
+            text = file.read(chunk_size)
+            if not text:
+                return
+            yield text, file.buffer.tell()
+
+
+def open_document(path, chunk_size=READ_CHUNK_SIZE):
+    """
+    ### Open Document
+    Reads the file at `path` into a new `Document`, one chunk at a time like
+    the editor does.
+    """
+    document = Document()
+    for text, bytes_read in read_chunks(path, chunk_size):
+        document.insert(document.length, text)
+    return document
+
+
+def file_mode(path):
+    """
+    ### File Mode
+    Returns the permissions a save to `path` should have: those of the file
+    it replaces, or the default ones for a new file.
+    """
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _copy_owner(path, temp_path):
+    """Gives `temp_path` the owner of `path` (if it exists and it's allowed)"""
+    if not hasattr(os, "chown"):
+        return
+
+    try:
+        info = os.stat(path)
+    except OSError:
+        return
+
+    try:
+        os.chown(temp_path, info.st_uid, info.st_gid)
+    except OSError:
+        # only root may give a file away, the group may still be kept
+        try:
+            os.chown(temp_path, -1, info.st_gid)
+        except OSError:
+            pass
+
+
+def write_atomically(path, chunks, mode=None, fsync="file", newline=None):
+    """
+    ### Write Atomically
+    Writes the strings of `chunks` to a temporary file in the same directory,
+    syncs it to disk according to `fsync` ("never", "file" or "full", which
+    syncs the directory too) and then moves it over `path`, so a crash can
+    never leave a half written file. Returns the number of bytes written.
+    `newline` is that of `open` (`""` writes the line endings as they are).
+    A symlink is followed, the file it points to is the one replaced, and
+    keeps its owner where that's allowed (hard links still end up split).
+
+    Raises `OSError` or `UnicodeEncodeError`, leaving `path` untouched.
+    """
+    # the link stays, its target is replaced
+    path = os.path.realpath(path)
+    directory = os.path.dirname(path)
+    if mode is None:
+        mode = file_mode(path)
+
+    handle, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+
+    try:
+        with os.fdopen(handle, "w", encoding="utf-8", newline=newline) as file:
+            for chunk in chunks:
+                file.write(chunk)
+
+            file.flush()
+            if fsync != "never":
+                os.fsync(file.fileno())
+            size = file.tell()
+
+        os.chmod(temp_path, mode)
+        _copy_owner(path, temp_path)
+        os.replace(temp_path, path)
+
+        # the rename itself is only durable once the directory is synced
+        if fsync == "full" and hasattr(os, "O_DIRECTORY"):
+            dir_handle = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_handle)
+            finally:
+                os.close(dir_handle)
+
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+    return size
+
+
+def save_document(document, path, fsync="file"):
+    """
+    ### Save Document
+    Writes `document` (or a snapshot of it) to `path` with
+    `write_atomically`. Returns the number of bytes written.
+    """
+    return write_atomically(path, document.chunks(WRITE_CHUNK_SIZE),
+                            fsync=fsync)
+
+
+def read_line_blocks(path, block_size=BATCH_BLOCK_SIZE):
+    """
+    ### Read Line Blocks
+    Returns a generator of the text of the utf-8 file at `path` in blocks of
+    whole lines, of about `block_size` characters (a longer line is a block
+    of its own). Line endings are kept as they are.
+    Raises `OSError` or `UnicodeDecodeError`.
+    """
+    with open(path, encoding="utf-8", newline="") as file:
+        pending = []  # the start of a line not read to its end yet
+        while True:
+            text = file.read(block_size)
+            if not text:
+                break
+
+            end = text.rfind("\n") + 1
+            if not end:
+                pending.append(text)
+                continue
+
+            yield "".join(pending) + text[:end]
+            pending = [text[end:]]
+
+        rest = "".join(pending)
+        if rest:
+            yield rest
+
+
+def replace_in_file(path, string, replacement, nocase=False, regex=False,
+                    whole_word=False, dry_run=False, fsync="file",
+                    block_size=BATCH_BLOCK_SIZE):
+    """
+    ### Replace in File
+    Replaces every match of `string` in the utf-8 file at `path` like
+    `replace_all` does in a text, one block of lines at a time (see
+    `read_line_blocks`), so files of any size take little memory. A match
+    can't span two blocks.
+
+    The file is read once to count the matches, and only written (with
+    `write_atomically`, keeping its line endings) if there are some and not
+    `dry_run`. Returns the number of matches and the size of the file.
+    Raises `OSError`, `UnicodeError` or `re.error`.
+    """
+    size = os.path.getsize(path)
+    count = 0
+    for block in read_line_blocks(path, block_size):
+        count += sum(1 for _ in find_all(block, string, nocase, regex,
+                                         whole_word))
+
+    if count and not dry_run:
+        blocks = (replace_all(block, string, replacement, nocase, regex,
+                              whole_word)[0]
+                  for block in read_line_blocks(path, block_size))
+        write_atomically(path, blocks, fsync=fsync, newline="")
+
+    return count, size
+
+
+# * Line index
+class LineIndex:
+    """
+    ### Line Index
+    The lines of a (large) file, so any line can be read without scanning
+    the file. Only the offset at which every `LINE_INDEX_STEP`th line starts
+    is kept (in an `array('Q')`), the lines in between are found by scanning
+    forward from the nearest one (see `line_offset`).
+
+    `start` uses the index saved next to the file when the file hasn't
+    changed since, otherwise it is built by a worker thread (`scanned` and
+    `done` tell how far it got) and saved when done.
+    """
+
+    def __init__(self, path):
+        file_stat = os.stat(path)
+        self.path = path
+        self.size = file_stat.st_size
+        self.mtime = file_stat.st_mtime_ns
+        self.checkpoints = array("Q", [0])  # where every 'LINE_INDEX_STEP'th line starts
+        self.starts = 1  # line starts found so far
+        self.scanned = 0  # bytes of the file scanned so far
+        self.done = False
+        self.cancelled = threading.Event()
+
+    @staticmethod
+    def index_file(path):
+        """Returns the path where the line index of `path` is saved"""
+        directory, name = os.path.split(os.path.abspath(path))
+        return os.path.join(directory, f".{name}.lineindex")
+
+    @property
+    def line_count(self):
+        """Number of lines found so far"""
+        if self.done:
+            return self.starts
+
+        # the last line start found so far may not be a complete line yet
+        return self.starts - 1
+
+    def line_offset(self, data, line):
+        """
+        Returns the offset at which `line` (0-based, one of the `starts`
+        found) starts in `data`, the bytes of the file (a `mmap`)
+        """
+        offset = self.checkpoints[line // LINE_INDEX_STEP]
+        for _ in range(line % LINE_INDEX_STEP):
+            offset = data.find(b"\n", offset) + 1
+        return offset
+
+    def line_of_offset(self, data, offset):
+        """Returns the line (0-based) holding byte `offset` of `data`, the bytes of the file"""
+        index = bisect_right(self.checkpoints, offset) - 1
+        checkpoint = self.checkpoints[index]
+        return index * LINE_INDEX_STEP + data[checkpoint:offset].count(b"\n")
+
+    def start(self):
+        """Loads the saved index, or starts building it in the background"""
+        if not self.load():
+            threading.Thread(target=self.build, daemon=True).start()
+
+    def cancel(self):
+        """Stops building the index"""
+        self.cancelled.set()
+
+    def build(self, chunk_size=LINE_INDEX_CHUNK):
+        """
+        Scans the file `chunk_size` bytes at a time for newlines, each one
+        starts a line. Saves the index when done.
+        """
+        checkpoints = self.checkpoints
+
+        try:
+            with open(self.path, "rb") as file:
+                while not self.cancelled.is_set():
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+
+                    # the newline before the next checkpoint, counted from 1
+                    starts = self.starts
+                    skip = -starts % LINE_INDEX_STEP + 1
+                    position = -1
+                    while True:
+                        for _ in range(skip):
+                            position = chunk.find(b"\n", position + 1)
+                            if position == -1:
+                                break
+                        if position == -1:
+                            break
+                        checkpoints.append(self.scanned + position + 1)
+                        skip = LINE_INDEX_STEP
+
+                    self.starts = starts + chunk.count(b"\n")
+                    self.scanned += len(chunk)
+
+        except OSError:
+            return
+
+        if not self.cancelled.is_set():
+            self.done = True
+            self.save()
+
+    def save(self):
+        """
+        Saves the index next to its file (only for files of
+        `LINE_INDEX_SAVE_SIZE` bytes or more), keyed by the file's
+        modification time and size.
+        """
+        if self.size < LINE_INDEX_SAVE_SIZE:
+            return
+
+        index_path = self.index_file(self.path)
+        header = struct.pack(LINE_INDEX_HEADER, b"TXLI", self.mtime,
+                             self.size, self.starts, LINE_INDEX_STEP)
+
+        try:
+            with open(f"{index_path}.tmp", "wb") as file:
+                file.write(header)
+                self.checkpoints.tofile(file)
+            os.replace(f"{index_path}.tmp", index_path)
+        except OSError:
+            # not being able to cache the index is not an error
+            pass
+
+    def load(self):
+        """
+        Fills the index from its saved copy. Returns `False` if there is no
+        saved index, or the file (or `LINE_INDEX_STEP`) changed since it was
+        saved.
+        """
+        header_size = struct.calcsize(LINE_INDEX_HEADER)
+
+        try:
+            with open(self.index_file(self.path), "rb") as file:
+                magic, mtime, size, starts, step = struct.unpack(
+                    LINE_INDEX_HEADER, file.read(header_size))
+
+                if ((magic, mtime, size, step) !=
+                        (b"TXLI", self.mtime, self.size, LINE_INDEX_STEP)):
+                    return False
+
+                checkpoints = array("Q")
+                checkpoints.fromfile(file, (starts - 1) // step + 1)
+
+        except (OSError, EOFError, struct.error):
+            return False
+
+        self.checkpoints, self.starts = checkpoints, starts
+        self.scanned, self.done = self.size, True
+        return True
+
+
+# * External changes
+def file_signature(path):
+    """
+    Returns `(mtime, size, inode)` of the file at `path`, what changes when
+    the file is written or replaced, or `None` if it doesn't exist.
+    """
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+
+
+def _inotify_watch(directory):
+    """
+    Returns a non-blocking inotify file descriptor watching `directory`, or
+    `None` where inotify isn't available (it's Linux only).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+
+    try:
+        import ctypes
+        import ctypes.util
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                           use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+
+        if libc.inotify_add_watch(fd, os.fsencode(directory), INOTIFY_MASK) < 0:
+            os.close(fd)
+            return None
+
+    except (OSError, AttributeError):
+        return None
+
+    return fd
+
+
+class FileWatcher:
+    """
+    ### File Watcher
+    Watches the file at `path` from a thread and sets `changed` once its
+    `file_signature` differs from `signature` (see `acknowledge`).
+
+    On Linux, inotify wakes the thread up as soon as anything happens in the
+    file's directory (a file replaced by an atomic save is a new file, so its
+    directory is watched, not the file). Elsewhere, or if inotify fails, the
+    file is polled every `poll_interval` seconds.
+    """
+
+    def __init__(self, path, poll_interval=1.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.signature = file_signature(path)
+        self.backend = None  # "inotify" or "stat", once started
+        self.changed = threading.Event()
+        self.stopped = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def acknowledge(self):
+        """Takes the current state of the file as the known one"""
+        self.changed.clear()
+        self.signature = file_signature(self.path)
+
+    def _run(self):
+        fd = _inotify_watch(os.path.dirname(os.path.abspath(self.path)))
+        self.backend = "stat" if fd is None else "inotify"
+
+        try:
+            while not self.stopped.is_set():
+                if fd is None:
+                    self.stopped.wait(self.poll_interval)
+                elif select.select([fd], [], [], self.poll_interval)[0]:
+                    # drain the events, and let the writer finish
+                    try:
+                        while os.read(fd, 64 * 1024):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    self.stopped.wait(WATCH_SETTLE_TIME)
+
+                if file_signature(self.path) != self.signature:
+                    self.changed.set()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+
+def _common_prefix(a, b, start=0):
+    """Returns the length of the common prefix of `a[start:]` and `b[start:]`"""
+    size = DIFF_BLOCK_SIZE
+    end = min(len(a), len(b))
+
+    # whole blocks first (compared in C), then the block that differs
+    while start < end and a[start:start + size] == b[start:start + size]:
+        start += size
+    if start >= end:
+        return end
+
+    block = os.path.commonprefix([a[start:start + size], b[start:start + size]])
+    return start + len(block)
+
+
+def _common_suffix(a, b, limit):
+    """Returns the length of the common suffix of `a` and `b`, up to `limit`"""
+    size = DIFF_BLOCK_SIZE
+    length = 0
+
+    while length < limit:
+        step = min(size, limit - length)
+        if a[len(a) - length - step:len(a) - length] != \
+                b[len(b) - length - step:len(b) - length]:
+            break
+        length += step
+    else:
+        return limit
+
+    step = min(size, limit - length)
+    block_a = a[len(a) - length - step:len(a) - length][::-1]
+    block_b = b[len(b) - length - step:len(b) - length][::-1]
+    return length + len(os.path.commonprefix([block_a, block_b]))
+
+
+def _line_blocks(lines):
+    """
+    Joins `lines` into blocks of about `DIFF_BLOCK_LINES` lines, cut after
+    each line whose hash is a multiple of it. The cuts depend on the content
+    rather than the position, so the blocks after an insertion still match.
+    """
+    blocks, start = [], 0
+    for end, line in enumerate(lines, 1):
+        if hash(line) % DIFF_BLOCK_LINES == 0:
+            blocks.append("".join(lines[start:end]))
+            start = end
+
+    if start < len(lines):
+        blocks.append("".join(lines[start:]))
+    return blocks
+
+
+def _unmatched(old_items, new_items, old_start, new_start):
+    """
+    Returns the `(old_start, old_end, new_start, new_end)` offsets of the runs
+    of `old_items` and `new_items` (strings, starting at `old_start` and
+    `new_start`) that don't match, matching the items by their hashes.
+    """
+    old_starts = list(accumulate(map(len, old_items), initial=old_start))
+    new_starts = list(accumulate(map(len, new_items), initial=new_start))
+
+    matcher = difflib.SequenceMatcher(None, old_items, new_items, autojunk=False)
+    return [(old_starts[i1], old_starts[i2], new_starts[j1], new_starts[j2])
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def diff_texts(old, new):
+    """
+    ### Diff Texts
+    Returns the hunks turning `old` into `new`, as `(start, end, text)`: the
+    text between offsets `start` and `end` of `old` is replaced with `text`.
+
+    Hunks are made of whole lines. The common beginning and end are skipped a
+    block at a time, what is left is compared line by line, by hash; when that's more than `DIFF_MAX_LINES`
+    lines, blocks of lines (see `_line_blocks`) are compared first, then the
+    lines of the blocks that differ.
+    """
+    if old == new:
+        return []
+
+    prefix = _common_prefix(old, new)
+    suffix = _common_suffix(old, new, min(len(old), len(new)) - prefix)
+
+    # whole lines only, so edits of the same line always meet in 'merge_hunks'
+    prefix = old.rfind("\n", 0, prefix) + 1
+    old_start, new_start = len(old) - suffix, len(new) - suffix
+    if suffix and not (old[old_start - 1:old_start] in ("", "\n") and
+                       new[new_start - 1:new_start] in ("", "\n")):
+        newline = old.find("\n", old_start)
+        suffix = 0 if newline == -1 else len(old) - newline - 1
+
+    regions = [(prefix, len(old) - suffix, prefix, len(new) - suffix)]
+
+    old_lines = old[prefix:regions[0][1]].splitlines(keepends=True)
+    new_lines = new[prefix:regions[0][3]].splitlines(keepends=True)
+    if len(old_lines) + len(new_lines) > DIFF_MAX_LINES:
+        regions = _unmatched(_line_blocks(old_lines), _line_blocks(new_lines),
+                             prefix, prefix)
+    del old_lines, new_lines
+
+    hunks = []
+    for old_start, old_end, new_start, new_end in regions:
+        old_lines = old[old_start:old_end].splitlines(keepends=True)
+        new_lines = new[new_start:new_end].splitlines(keepends=True)
+
+        if len(old_lines) + len(new_lines) > DIFF_MAX_LINES:
+            hunks.append((old_start, old_end, new[new_start:new_end]))
+            continue
+
+        hunks.extend((start, end, new[text_start:text_end])
+                     for start, end, text_start, text_end
+                     in _unmatched(old_lines, new_lines, old_start, new_start))
+
+    return hunks
+
+
+def merge_hunks(theirs, ours):
+    """
+    ### Merge Hunks
+    Three-way merge of two `diff_texts` of the same base: `theirs` (changes
+    made by another program) are moved past `ours` (unsaved edits).
+
+    Returns `(patch, conflicts)`: the hunks of `theirs` to apply to the text
+    with our edits (in its offsets), and the number of hunks of `theirs`
+    overlapping one of `ours` (or inserting at the same place), which are
+    left out (our edits win).
+    """
+    patch = []
+    conflicts = 0
+    shift = 0  # how much our edits before the hunk moved it
+    i = 0
+
+    for start, end, text in theirs:
+        # skip our hunks ending before this one (not inserting where it starts)
+        while i < len(ours) and (ours[i][1] < start or
+                                 ours[i][1] == start > ours[i][0]):
+            shift += len(ours[i][2]) - (ours[i][1] - ours[i][0])
+            i += 1
+
+        if i < len(ours) and (ours[i][0] < end or ours[i][0] == start):
+            conflicts += 1
+            continue
+
+        patch.append((start + shift, end + shift, text))
+
+    return patch, conflicts
+
+
+def shift_offset(offset, hunks):
+    """
+    Returns where `offset` ends up once the `hunks` (`(start, end, text)`,
+    in order) are applied. An offset inside a replaced span stays as far in
+    it as the new text allows.
+    """
+    shift = 0
+    for start, end, text in hunks:
+        if start >= offset:
+            break
+        if end <= offset:
+            shift += len(text) - (end - start)
+        else:
+            return start + shift + min(offset - start, len(text))
+
+    return offset + shift